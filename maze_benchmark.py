@@ -0,0 +1,287 @@
+import argparse
+import json
+import os
+import platform
+import random
+import tempfile
+import time
+import tracemalloc
+
+from maze_generator import generate_maze_string
+from maze_incremental import IncrementalSolver
+from maze_solver import DOWN, END, LEFT, MINE, RIGHT, START, UP, Maze, SolverStats, available_strategies, \
+    find_shortest_path, make_mazes, parse_maze_string, solve_stream, _get_strategy
+
+SUITE_SIZES = [10, 100, 500, 1000, 2000]
+
+def _parse_maze_string_eval(maze_string):
+    """
+    Function that parses a maze string the way parse_maze_string used to, by running eval on both halves.
+    It is only kept here as the baseline for the parse benchmark.
+    """
+    maze_info = maze_string.split("-")
+    maze_dimensions = eval(maze_info[0])
+    maze_rooms = eval(maze_info[1])
+    height = int(maze_dimensions[0])
+    width = int(maze_dimensions[1])
+    rooms = bytearray(height * width)
+    for idx in range(height * width):
+        room_value = int(maze_rooms[idx])
+        if not 0 <= room_value <= 127:
+            raise Exception("room_value is not in range!")
+        rooms[idx] = room_value
+    return Maze(height, width, rooms)
+
+def _best_time(function, argument, repeat):
+    """
+    Function that returns the best wall time in seconds of calling function(argument) repeat times
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function(argument)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+def benchmark_parse(sizes, repeat=3):
+    """
+    Function that times parse_maze_string against the old eval parser on square mazes of the given sizes.
+    Returns one result dict per size.
+    """
+    results = []
+    for size in sizes:
+        maze_string = generate_maze_string(size, size, seed=size)
+        eval_seconds = _best_time(_parse_maze_string_eval, maze_string, repeat)
+        tokenizer_seconds = _best_time(parse_maze_string, maze_string, repeat)
+        results.append({
+            "size": "{}x{}".format(size, size),
+            "rooms": size * size,
+            "eval_seconds": eval_seconds,
+            "tokenizer_seconds": tokenizer_seconds,
+            "speedup": eval_seconds / tokenizer_seconds
+        })
+    return results
+
+def benchmark_strategies(maze_file_path, lives=3, repeat=3):
+    """
+    Function that runs every search engine on every maze of a maze file.
+    Returns one result dict per maze and engine with the path length, states expanded and best wall time.
+    """
+    results = []
+    for idx, maze in enumerate(make_mazes(maze_file_path)):
+        for strategy in available_strategies():
+            search = _get_strategy(strategy)
+            stats = SolverStats()
+            path, _ = search(maze, lives, None, stats)
+            results.append({
+                "maze": idx + 1,
+                "rooms": maze.height * maze.width,
+                "strategy": strategy,
+                "path_length": len(path) if path is not None else None,
+                "expanded": stats.expanded,
+                "seconds": _best_time(lambda maze: search(maze, lives), maze, repeat)
+            })
+    return results
+
+def _peak_memory(function, *args):
+    """
+    Function that returns the peak memory in bytes traced by tracemalloc while calling function(*args)
+    """
+    tracemalloc.start()
+    try:
+        function(*args)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+def _solve_file(maze_file_path):
+    """
+    Function that runs a maze file end to end through solve_stream
+    """
+    for _ in solve_stream(maze_file_path):
+        pass
+
+def benchmark_suite(sizes=None, seed=0, loop_density=0.05, mine_density=0.0002, strategy="bfs", repeat=1,
+                    trace_memory=True):
+    """
+    Function that benchmarks parsing, solving and the whole run on one generated square maze per size tier.
+    Times are the best of repeat runs. Peak memory of parsing and of the whole run is traced by tracemalloc
+    in separate runs so the tracing does not slow the timed ones, and as tracing slows Python down
+    many times over it can be turned off with trace_memory.
+    Returns one result dict per size, ready to be written out as JSON.
+    """
+    results = []
+    search = _get_strategy(strategy)
+    with tempfile.TemporaryDirectory() as directory:
+        for size in sizes or SUITE_SIZES:
+            maze_string = generate_maze_string(size, size, seed + size, loop_density, mine_density)
+            maze_file_path = os.path.join(directory, "maze_{}.txt".format(size))
+            with open(maze_file_path, "w") as f:
+                f.write(maze_string)
+            maze = parse_maze_string(maze_string)
+            stats = SolverStats()
+            path, _ = search(maze, 3, None, stats)
+            result = {
+                "size": "{}x{}".format(size, size),
+                "rooms": size * size,
+                "strategy": strategy,
+                "path_length": len(path) if path is not None else None,
+                "expanded": stats.expanded,
+                "queue_peak": stats.queue_peak,
+                "parse_seconds": _best_time(parse_maze_string, maze_string, repeat),
+                "solve_seconds": _best_time(lambda maze: search(maze, 3), maze, repeat),
+                "end_to_end_seconds": _best_time(_solve_file, maze_file_path, repeat),
+                "parse_peak_bytes": None,
+                "end_to_end_peak_bytes": None
+            }
+            if trace_memory:
+                result["parse_peak_bytes"] = _peak_memory(parse_maze_string, maze_string)
+                result["end_to_end_peak_bytes"] = _peak_memory(_solve_file, maze_file_path)
+            results.append(result)
+    return results
+
+def _corner_to_corner(maze):
+    """
+    Function that moves the start of a maze to its top left room and the end to its bottom right room
+    """
+    start, end = maze.start, maze.end
+    last = maze.height * maze.width - 1
+    maze.update_room((1, 1), maze.rooms[0] | START)
+    if start != 0:
+        maze.update_room(maze.room_id(start), maze.rooms[start] & ~START)
+    maze.update_room(maze.room_id(last), maze.rooms[last] | END)
+    if end != last:
+        maze.update_room(maze.room_id(end), maze.rooms[end] & ~END)
+
+def _random_edit(rng, maze):
+    """
+    Function that picks a random level edit: a door opened or closed on both sides, or a mine added or removed.
+    Returns the (room ID, room value) changes that make it.
+    """
+    room = rng.randrange(maze.height * maze.width)
+    row, column = divmod(room, maze.width)
+    doors = [(bit, back_bit, step) for bit, back_bit, step, in_bounds in (
+        (UP, DOWN, -maze.width, row > 0),
+        (DOWN, UP, maze.width, row < maze.height - 1),
+        (LEFT, RIGHT, -1, column > 0),
+        (RIGHT, LEFT, 1, column < maze.width - 1)
+    ) if in_bounds]
+    if not doors or rng.random() < 0.3:
+        return [(maze.room_id(room), maze.rooms[room] ^ MINE)]
+    bit, back_bit, step = doors[rng.randrange(len(doors))]
+    return [(maze.room_id(room), maze.rooms[room] ^ bit), (maze.room_id(room + step), maze.rooms[room + step] ^ back_bit)]
+
+def benchmark_edits(size=200, edits=100, seed=0, loop_density=0.1, mine_density=0.01, lives=3):
+    """
+    Function that replays a stream of random level edits on a generated square maze, with the start and end
+    in opposite corners, and asks for the shortest path after every edit.
+    It times the IncrementalSolver repairing its kept search against a fresh find_shortest_path on the edited maze,
+    and counts the edits after which the two paths differ, which should be none.
+    Returns one result dict, ready to be written out as JSON.
+    """
+    rng = random.Random(seed)
+    maze = parse_maze_string(generate_maze_string(size, size, seed, loop_density, mine_density))
+    _corner_to_corner(maze)
+    started = time.perf_counter()
+    fresh_path = find_shortest_path(maze, lives=lives)
+    fresh_seconds = time.perf_counter() - started
+    started = time.perf_counter()
+    solver = IncrementalSolver(maze, lives)
+    path = solver.shortest_path()
+    result = {
+        "size": "{}x{}".format(size, size),
+        "rooms": size * size,
+        "edits": edits,
+        "first_path_length": len(path) if path != ["N/A"] else None,
+        "first_incremental_seconds": time.perf_counter() - started,
+        "first_fresh_seconds": fresh_seconds,
+        "incremental_seconds": 0.0,
+        "fresh_seconds": 0.0,
+        "expanded_per_edit": 0.0,
+        "mismatches": int(path != fresh_path)
+    }
+    stats = SolverStats()
+    for _ in range(edits):
+        changes = _random_edit(rng, maze)
+        started = time.perf_counter()
+        for room_id, room_value in changes:
+            solver.update_room(room_id, room_value)
+        path = solver.shortest_path(stats)
+        result["incremental_seconds"] += time.perf_counter() - started
+        started = time.perf_counter()
+        fresh_path = find_shortest_path(maze, lives=lives)
+        result["fresh_seconds"] += time.perf_counter() - started
+        result["mismatches"] += int(path != fresh_path)
+    result["expanded_per_edit"] = stats.expanded / edits if edits else 0.0
+    return result
+
+def write_report(results, report_path):
+    """
+    Function that writes benchmark results to a JSON report, together with the Python and machine they ran on
+    """
+    report = {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "machine": platform.machine(),
+        "results": results
+    }
+    with open(report_path, "w") as f:
+        json.dump(report, f, indent=2)
+
+def main(argv=None):
+    """
+    Main function to run the maze_benchmark.py
+    """
+    parser = argparse.ArgumentParser(description="Benchmark the maze solver.")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per measurement, the best one is kept")
+    commands = parser.add_subparsers(dest="command", required=True)
+    parse = commands.add_parser("parse", help="time the tokenizer against the old eval parser")
+    parse.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 500],
+                       help="side lengths of the square mazes to benchmark")
+    strategies = commands.add_parser("strategies", help="compare the search engines on a maze file")
+    strategies.add_argument("file_path", nargs="?", default="mazes.txt", help="maze file with one maze per line")
+    strategies.add_argument("--lives", type=int, default=3, help="lives budget of every search")
+    suite = commands.add_parser("suite", help="time parse, solve and end to end runs on generated mazes")
+    suite.add_argument("--sizes", type=int, nargs="+", default=SUITE_SIZES,
+                       help="side lengths of the square mazes to benchmark")
+    suite.add_argument("--seed", type=int, default=0, help="seed of the maze generator")
+    suite.add_argument("--loops", type=float, default=0.05, help="share of rooms with an extra door")
+    suite.add_argument("--mines", type=float, default=0.0002, help="share of rooms with a mine")
+    suite.add_argument("--strategy", default="bfs", help="search engine to solve with")
+    suite.add_argument("--no-memory", action="store_true", help="skip the slow tracemalloc runs")
+    suite.add_argument("--json", default=None, help="file to write the JSON report to")
+    edits = commands.add_parser("edits", help="time incremental re-solves against fresh solves on an edit stream")
+    edits.add_argument("--size", type=int, default=200, help="side length of the square maze")
+    edits.add_argument("--edits", type=int, default=100, help="number of edits to replay")
+    edits.add_argument("--seed", type=int, default=0, help="seed of the maze and the edits")
+    edits.add_argument("--lives", type=int, default=3, help="lives budget of every search")
+    edits.add_argument("--json", default=None, help="file to write the JSON report to")
+    args = parser.parse_args(argv)
+    if args.command == "parse":
+        for result in benchmark_parse(args.sizes, args.repeat):
+            print("parse {size} ({rooms} rooms): eval {eval_seconds:.4f}s, tokenizer {tokenizer_seconds:.4f}s, "
+                  "{speedup:.1f}x faster".format(**result))
+    elif args.command == "strategies":
+        for result in benchmark_strategies(args.file_path, args.lives, args.repeat):
+            print("maze #{maze} ({rooms} rooms) {strategy}: path length {path_length}, "
+                  "{expanded} states expanded, {seconds:.5f}s".format(**result))
+    elif args.command == "edits":
+        result = benchmark_edits(args.size, args.edits, args.seed, lives=args.lives)
+        print("edits {size} x {edits}: first solve incremental {first_incremental_seconds:.4f}s, "
+              "fresh {first_fresh_seconds:.4f}s; after edits incremental {incremental_seconds:.4f}s, "
+              "fresh {fresh_seconds:.4f}s, {expanded_per_edit:.1f} states expanded per edit, "
+              "{mismatches} mismatches".format(**result))
+        if args.json:
+            write_report([result], args.json)
+    else:
+        results = benchmark_suite(args.sizes, args.seed, args.loops, args.mines, args.strategy, args.repeat,
+                                  not args.no_memory)
+        for result in results:
+            print("suite {size} {strategy}: path length {path_length}, {expanded} states expanded, "
+                  "parse {parse_seconds:.4f}s, solve {solve_seconds:.4f}s, end to end {end_to_end_seconds:.4f}s, "
+                  "peak memory {end_to_end_peak_bytes} bytes".format(**result))
+        if args.json:
+            write_report(results, args.json)
+
+if __name__ == '__main__':
+    main()
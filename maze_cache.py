@@ -0,0 +1,143 @@
+import hashlib
+import logging
+import sqlite3
+import struct
+from collections import OrderedDict
+
+from maze_solver import Maze, find_shortest_path
+
+_DIRECTION_CODES = {"up": "u", "down": "d", "left": "l", "right": "r"}
+_DIRECTIONS = {code: direction for direction, code in _DIRECTION_CODES.items()}
+
+logger = logging.getLogger(__name__)
+
+def maze_key(maze, lives=3):
+    """
+    Function that returns the content hash a solution is cached under.
+    It covers the dimensions, the start room, every room value and the lives budget,
+    so the same maze read from text, a dict or a maze store gets the same key.
+    """
+    if isinstance(maze, dict):
+        maze = Maze.from_dict(maze)
+    elif not isinstance(maze, Maze):
+        raise Exception("maze is not a dict!")
+    digest = hashlib.sha256(struct.pack("<IIII", maze.height, maze.width, maze.start, lives))
+    digest.update(maze.rooms)
+    return digest.digest()
+
+def _encode_path(path):
+    """
+    Function that packs a shortest path into one letter per step, with an empty string for ["N/A"]
+    """
+    if path == ["N/A"]:
+        return ""
+    return "".join(_DIRECTION_CODES[direction] for direction in path)
+
+def _decode_path(encoded_path):
+    """
+    Function that unpacks a path packed by _encode_path
+    """
+    if not encoded_path:
+        return ["N/A"]
+    return [_DIRECTIONS[code] for code in encoded_path]
+
+class SolutionCache(object):
+    """
+    Class that caches shortest paths by the content hash of the maze and lives budget.
+    Recent paths are kept in a bounded in memory LRU, and with a store_path every path
+    is also saved to a sqlite file so it survives between batch runs.
+    The file is in WAL mode and every path is committed as soon as it is saved, so caches in several
+    worker processes can share one file without holding its write lock while they solve.
+    A failed read or write of the file is only logged, the maze is then solved and its path returned as usual.
+    """
+
+    def __init__(self, max_entries=1024, store_path=None):
+        if not isinstance(max_entries, int) or isinstance(max_entries, bool) or max_entries < 0:
+            raise Exception("max_entries is not a non negative int!")
+        self.max_entries = max_entries
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._memory = OrderedDict()
+        self._db = None
+        if store_path is not None:
+            self._db = sqlite3.connect(store_path, timeout=30, isolation_level=None)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("CREATE TABLE IF NOT EXISTS solutions (key BLOB PRIMARY KEY, path TEXT NOT NULL)")
+
+    def _remember(self, key, encoded_path):
+        """
+        Method that puts a path at the front of the in memory LRU, evicting the least recently used one when full
+        """
+        if not self.max_entries:
+            return
+        self._memory[key] = encoded_path
+        self._memory.move_to_end(key)
+        if len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self.evictions += 1
+
+    def solve(self, maze, lives=3, timeout=None, stats=None):
+        """
+        Method that returns the shortest path of a maze, only searching for it when it is not cached yet.
+        stats is handed to find_shortest_path on a miss.
+        """
+        key = maze_key(maze, lives)
+        encoded_path = self._memory.get(key)
+        if encoded_path is not None:
+            self._memory.move_to_end(key)
+            self.hits += 1
+            return _decode_path(encoded_path)
+        if self._db is not None:
+            try:
+                row = self._db.execute("SELECT path FROM solutions WHERE key = ?", (key,)).fetchone()
+            except sqlite3.Error as e:
+                logger.warning("Could not read the solution cache: %s", e)
+                row = None
+            if row is not None:
+                self.disk_hits += 1
+                self._remember(key, row[0])
+                return _decode_path(row[0])
+        self.misses += 1
+        path = find_shortest_path(maze, timeout=timeout, lives=lives, stats=stats)
+        encoded_path = _encode_path(path)
+        self._remember(key, encoded_path)
+        if self._db is not None:
+            try:
+                self._db.execute("INSERT OR REPLACE INTO solutions (key, path) VALUES (?, ?)", (key, encoded_path))
+            except sqlite3.Error as e:
+                logger.warning("Could not save a solved path to the solution cache: %s", e)
+        return path
+
+    def stats(self):
+        """
+        Method that returns the hit, miss and eviction counts of the cache
+        """
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": len(self._memory)
+        }
+
+    def clear(self):
+        """
+        Method that empties the in memory LRU, the sqlite file is left as it is
+        """
+        self._memory.clear()
+
+    def close(self):
+        """
+        Method that closes the sqlite file
+        """
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,314 @@
+import heapq
+from array import array
+from collections import OrderedDict
+
+from maze_cache import maze_key
+from maze_solver import DOWN, END, LEFT, MINE, RIGHT, START, UP, _DEADLINE_POLL, _check_deadline, _hooks, \
+    _step_direction
+
+_DOOR_BITS = (UP, DOWN, LEFT, RIGHT)
+_DOOR_COUNTS = bytes(bin(room_value & (UP | RIGHT | DOWN | LEFT)).count("1") for room_value in range(256))
+_CACHE_ENTRIES = 16
+_UNREACHED = 1 << 60
+
+class ContractedMaze(object):
+    """
+    Class that holds the search graph of a maze with its corridors contracted.
+    A corridor room has exactly two doors out and can only be entered through them, and is not the start or an end,
+    so a shortest path that enters it always leaves through the other door.
+    Every other room is a node, and every run from a node through corridor rooms to the next node
+    becomes one edge holding the node it reaches, its length, the mines it enters, the node at its end included,
+    and the first room it enters, from which its directions are walked again once a path is found.
+    Each corridor is walked once, giving the edges both ways along it.
+    Nodes other than the start and the ends that lead nowhere, or only back to the one node next to them,
+    can never be on a shortest path, so those dead ends are pruned, again and again as pruning opens new ones.
+    Edges out of a node are kept in the order up, down, left, right of their first step.
+    """
+    __slots__ = ("height", "width", "nodes", "node_of", "out_edges", "in_edges", "start_node", "end_nodes")
+
+    def __init__(self, maze):
+        self.height = height = maze.height
+        self.width = width = maze.width
+        rooms = maze.rooms
+        room_count = height * width
+        first_exits = array("l", [-1]) * room_count
+        second_exits = array("l", [-1]) * room_count
+        for room in range(room_count):
+            room_value = rooms[room]
+            if room_value & (START | END) or _DOOR_COUNTS[room_value] != 2 or room == maze.start:
+                continue
+            row, column = divmod(room, width)
+            exits = []
+            for bit, back_bit, step, in_bounds in (
+                (UP, DOWN, -width, row > 0),
+                (DOWN, UP, width, row < height - 1),
+                (LEFT, RIGHT, -1, column > 0),
+                (RIGHT, LEFT, 1, column < width - 1)
+            ):
+                if not in_bounds:
+                    if room_value & bit:
+                        break
+                elif room_value & bit:
+                    exits.append(room + step)
+                elif rooms[room + step] & back_bit:
+                    break
+            else:
+                first_exits[room], second_exits[room] = exits
+
+        node_of = array("l", [-1]) * room_count
+        nodes = []
+        for room in range(room_count):
+            if first_exits[room] < 0:
+                node_of[room] = len(nodes)
+                nodes.append(room)
+        # Edges go into one slot per door, up, down, left, right, so every node's edges come out in that order
+        edge_slots = [None] * (4 * len(nodes))
+        walked = bytearray(room_count)
+        for node, room in enumerate(nodes):
+            room_value = rooms[room]
+            row, column = divmod(room, width)
+            for door, (bit, step, in_bounds) in enumerate((
+                (UP, -width, row > 0),
+                (DOWN, width, row < height - 1),
+                (LEFT, -1, column > 0),
+                (RIGHT, 1, column < width - 1)
+            )):
+                if not room_value & bit or not in_bounds:
+                    continue
+                next_room = room + step
+                if first_exits[next_room] < 0:
+                    next_mines = 1 if rooms[next_room] & MINE else 0
+                    edge_slots[4 * node + door] = (node_of[next_room], 1, next_mines, next_room)
+                    continue
+                if walked[next_room]:
+                    continue
+                previous_room = room
+                corridor_room = next_room
+                length = 1
+                mines = 0
+                while first_exits[corridor_room] >= 0:
+                    walked[corridor_room] = 1
+                    if rooms[corridor_room] & MINE:
+                        mines += 1
+                    exit_room = first_exits[corridor_room]
+                    if exit_room == previous_room:
+                        exit_room = second_exits[corridor_room]
+                    previous_room, corridor_room = corridor_room, exit_room
+                    length += 1
+                if corridor_room == room:
+                    continue
+                end_node = node_of[corridor_room]
+                end_mines = mines + (1 if rooms[corridor_room] & MINE else 0)
+                edge_slots[4 * node + door] = (end_node, length, end_mines, next_room)
+                back_step = previous_room - corridor_room
+                back_door = 0 if back_step == -width else 1 if back_step == width else 2 if back_step == -1 else 3
+                if rooms[corridor_room] & _DOOR_BITS[back_door]:
+                    back_mines = mines + (1 if room_value & MINE else 0)
+                    edge_slots[4 * end_node + back_door] = (node, length, back_mines, previous_room)
+        out_edges = [[edge for edge in edge_slots[4 * node:4 * node + 4] if edge is not None]
+                     for node in range(len(nodes))]
+        self.nodes = nodes
+        self.node_of = node_of
+        self.start_node = node_of[maze.start]
+        self.end_nodes = [node for node, room in enumerate(nodes) if rooms[room] & END]
+        self.out_edges = out_edges
+        self._prune_dead_ends()
+
+    def _doors_out(self, rooms, room):
+        """
+        Method that returns the rooms a room has a door to, in the order up, down, left, right
+        """
+        width = self.width
+        room_value = rooms[room]
+        row, column = divmod(room, width)
+        return [room + step for bit, step, in_bounds in (
+            (UP, -width, row > 0),
+            (DOWN, width, row < self.height - 1),
+            (LEFT, -1, column > 0),
+            (RIGHT, 1, column < width - 1)
+        ) if room_value & bit and in_bounds]
+
+    def edge_directions(self, rooms, node, edge):
+        """
+        Method that walks an edge out of a node again through its corridor rooms and returns its directions
+        """
+        width = self.width
+        target_room = self.nodes[edge[0]]
+        previous_room = self.nodes[node]
+        room = edge[3]
+        directions = [_step_direction(room - previous_room, width)]
+        while room != target_room:
+            first, second = self._doors_out(rooms, room)
+            previous_room, room = room, second if first == previous_room else first
+            directions.append(_step_direction(room - previous_room, width))
+        return directions
+
+    def _prune_dead_ends(self):
+        """
+        Method that drops the nodes, other than the start and the ends, that have no edge out
+        or whose edges all lead to and from one other node, then rebuilds the edge lists without them
+        """
+        node_count = len(self.nodes)
+        keep = bytearray(node_count)
+        keep[self.start_node] = 1
+        for node in self.end_nodes:
+            keep[node] = 1
+        neighbours = [set() for _ in range(node_count)]
+        edges_out = [len(edges) for edges in self.out_edges]
+        sources = [[] for _ in range(node_count)]
+        for node, edges in enumerate(self.out_edges):
+            for target, _, _, _ in edges:
+                neighbours[node].add(target)
+                neighbours[target].add(node)
+                sources[target].append(node)
+        alive = bytearray([1]) * node_count
+        dead_ends = [node for node in range(node_count)
+                     if not keep[node] and (not edges_out[node] or len(neighbours[node]) <= 1)]
+        while dead_ends:
+            node = dead_ends.pop()
+            if not alive[node]:
+                continue
+            alive[node] = 0
+            for source in sources[node]:
+                edges_out[source] -= 1
+            for neighbour in neighbours[node]:
+                neighbours[neighbour].discard(node)
+                if alive[neighbour] and not keep[neighbour] and \
+                        (not edges_out[neighbour] or len(neighbours[neighbour]) <= 1):
+                    dead_ends.append(neighbour)
+
+        renumbered = array("l", [-1]) * node_count
+        nodes = []
+        for node, room in enumerate(self.nodes):
+            self.node_of[room] = -1
+            if alive[node]:
+                renumbered[node] = len(nodes)
+                self.node_of[room] = len(nodes)
+                nodes.append(room)
+        out_edges = [[(renumbered[target], length, mines, first_room)
+                      for target, length, mines, first_room in self.out_edges[node] if alive[target]]
+                     for node in range(node_count) if alive[node]]
+        in_edges = [[] for _ in nodes]
+        for node, edges in enumerate(out_edges):
+            for target, length, mines, _ in edges:
+                in_edges[target].append((node, length, mines))
+        self.nodes = nodes
+        self.out_edges = out_edges
+        self.in_edges = in_edges
+        self.start_node = renumbered[self.start_node]
+        self.end_nodes = [renumbered[node] for node in self.end_nodes]
+
+    @property
+    def edge_count(self):
+        """
+        Number of edges left in the contracted graph
+        """
+        return sum(len(edges) for edges in self.out_edges)
+
+    def __repr__(self):
+        return "ContractedMaze(height={}, width={}, nodes={}, edges={})".format(
+            self.height, self.width, len(self.nodes), self.edge_count)
+
+_contracted_mazes = OrderedDict()
+
+def contract_maze(maze):
+    """
+    Function that returns the contracted graph of a maze, building it only when it is not cached yet.
+    The graph does not depend on the lives budget, so graphs are cached by the content hash of the maze alone,
+    in an LRU of the last few mazes, and an edited maze gets a graph of its own.
+    """
+    key = maze_key(maze, 0)
+    graph = _contracted_mazes.get(key)
+    if graph is None:
+        graph = ContractedMaze(maze)
+        _contracted_mazes[key] = graph
+        if len(_contracted_mazes) > _CACHE_ENTRIES:
+            _contracted_mazes.popitem(last=False)
+    _contracted_mazes.move_to_end(key)
+    return graph
+
+def search_contracted(maze, lives, deadline=None, stats=None):
+    """
+    Function that runs a Dijkstra search on the contracted graph of a maze, weighted by corridor length.
+    It searches backwards from the end nodes over (node, lives remaining) states until the start state is settled,
+    then walks forward from the start taking, at every node, the first edge in the order up, down, left, right
+    that stays on a shortest path, so it is the same path find_shortest_path returns.
+    The directions of the edges taken are only walked again at the end.
+    Hooks see nodes as they are settled by the backward search.
+    Returns the path, or None if the end cannot be reached, and the lives remaining at the end.
+    """
+    rooms = maze.rooms
+    start_lives = lives - 1 if rooms[maze.start] & MINE else lives
+    if start_lives <= 0:
+        return None, 0
+    if rooms[maze.start] & END:
+        return [], start_lives
+    if stats is None:
+        graph = contract_maze(maze)
+    else:
+        with stats.phase("contract"):
+            graph = contract_maze(maze)
+    on_expand, on_enqueue, on_goal = _hooks(maze, stats)
+    nodes = graph.nodes
+    stride = lives + 1
+    distances = array("q", [_UNREACHED]) * (len(nodes) * stride)
+    queue = []
+    for node in graph.end_nodes:
+        for node_lives in range(1, stride):
+            distances[node * stride + node_lives] = 0
+            queue.append((0, node * stride + node_lives))
+    heapq.heapify(queue)
+    start_state = graph.start_node * stride + start_lives
+    expanded = enqueued = pruned_visited = pruned_lives = 0
+    queue_peak = len(queue)
+    polls = _DEADLINE_POLL
+    while queue:
+        polls -= 1
+        if not polls:
+            polls = _DEADLINE_POLL
+            _check_deadline(deadline)
+        distance, state = heapq.heappop(queue)
+        if distance != distances[state]:
+            continue
+        expanded += 1
+        node, node_lives = divmod(state, stride)
+        if on_expand is not None:
+            on_expand(nodes[node], node_lives)
+        if state == start_state:
+            break
+        for source, length, mines in graph.in_edges[node]:
+            source_lives = node_lives + mines
+            if source_lives >= stride:
+                pruned_lives += 1
+                continue
+            source_state = source * stride + source_lives
+            if distances[source_state] <= distance + length:
+                pruned_visited += 1
+                continue
+            distances[source_state] = distance + length
+            heapq.heappush(queue, (distance + length, source_state))
+            enqueued += 1
+            if on_enqueue is not None:
+                on_enqueue(nodes[source], source_lives)
+        if len(queue) > queue_peak:
+            queue_peak = len(queue)
+    if stats is not None:
+        stats._record(expanded, enqueued, pruned_visited, pruned_lives, queue_peak)
+
+    distance = distances[start_state]
+    if distance >= _UNREACHED:
+        return None, 0
+    path = []
+    node, node_lives = graph.start_node, start_lives
+    while distance:
+        for edge in graph.out_edges[node]:
+            target, length, mines, _ = edge
+            target_lives = node_lives - mines
+            if target_lives > 0 and distances[target * stride + target_lives] == distance - length:
+                path.extend(graph.edge_directions(rooms, node, edge))
+                node, node_lives = target, target_lives
+                distance -= length
+                break
+    if on_goal is not None:
+        on_goal(nodes[node], node_lives)
+    return path, node_lives
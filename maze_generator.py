@@ -0,0 +1,108 @@
+import argparse
+import random
+
+from maze_solver import DOWN, END, LEFT, MINE, RIGHT, START, UP
+
+def generate_rooms(height, width, seed=0, loop_density=0.05, mine_density=0.05):
+    """
+    Function that generates the room values of a random maze.
+    A randomized depth first search carves a spanning tree, so every room can reach every other,
+    then loop_density of the rooms get one more wall knocked through to add loops,
+    and mine_density of the rooms, other than the start and end, get a mine.
+    Doors always open on both sides, and the same seed always gives the same maze.
+    Returns the rooms as a bytearray in row-major order.
+    """
+    if not isinstance(height, int) or isinstance(height, bool) or height < 1:
+        raise Exception("height is not a positive int!")
+    if not isinstance(width, int) or isinstance(width, bool) or width < 1:
+        raise Exception("width is not a positive int!")
+    if not 0 <= loop_density <= 1:
+        raise Exception("loop_density is not in range!")
+    if not 0 <= mine_density <= 1:
+        raise Exception("mine_density is not in range!")
+    rng = random.Random(seed)
+    room_count = height * width
+    rooms = bytearray(room_count)
+    carved = bytearray(room_count)
+    first_room = rng.randrange(room_count)
+    carved[first_room] = 1
+    stack = [first_room]
+    while stack:
+        room = stack[-1]
+        row, column = divmod(room, width)
+        options = []
+        if row > 0 and not carved[room - width]:
+            options.append((UP, DOWN, room - width))
+        if row < height - 1 and not carved[room + width]:
+            options.append((DOWN, UP, room + width))
+        if column > 0 and not carved[room - 1]:
+            options.append((LEFT, RIGHT, room - 1))
+        if column < width - 1 and not carved[room + 1]:
+            options.append((RIGHT, LEFT, room + 1))
+        if not options:
+            stack.pop()
+            continue
+        door, back_door, next_room = options[rng.randrange(len(options))]
+        rooms[room] |= door
+        rooms[next_room] |= back_door
+        carved[next_room] = 1
+        stack.append(next_room)
+
+    for room in range(room_count):
+        if rng.random() >= loop_density:
+            continue
+        row, column = divmod(room, width)
+        if rng.random() < 0.5 and column < width - 1:
+            rooms[room] |= RIGHT
+            rooms[room + 1] |= LEFT
+        elif row < height - 1:
+            rooms[room] |= DOWN
+            rooms[room + width] |= UP
+
+    start = rng.randrange(room_count)
+    end = rng.randrange(room_count - 1) if room_count > 1 else 0
+    if room_count > 1 and end >= start:
+        end += 1
+    for room in range(room_count):
+        if room != start and room != end and rng.random() < mine_density:
+            rooms[room] |= MINE
+    rooms[start] |= START
+    rooms[end] |= END
+    return rooms
+
+def generate_maze_string(height, width, seed=0, loop_density=0.05, mine_density=0.05):
+    """
+    Function that generates a random maze in the (R,C)-[...] maze string format, see generate_rooms
+    """
+    rooms = generate_rooms(height, width, seed, loop_density, mine_density)
+    return "({},{})-[{}]".format(height, width, ",".join(map(str, rooms)))
+
+def write_maze_file(maze_file_path, count, height, width, seed=0, loop_density=0.05, mine_density=0.05):
+    """
+    Function that writes count generated mazes to a maze file, one per line.
+    Maze n is generated with seed + n, so the file is the same for the same seed.
+    """
+    if not isinstance(maze_file_path, str):
+        raise Exception("maze_file_path is not a string!")
+    with open(maze_file_path, "w") as f:
+        for n in range(count):
+            f.write(generate_maze_string(height, width, seed + n, loop_density, mine_density))
+            f.write("\n")
+
+def main(argv=None):
+    """
+    Main function to run the maze_generator.py
+    """
+    parser = argparse.ArgumentParser(description="Write a file of random mazes in the maze string format.")
+    parser.add_argument("file_path", help="maze file to write")
+    parser.add_argument("--count", type=int, default=1, help="number of mazes to write")
+    parser.add_argument("--height", type=int, default=10, help="rows of every maze")
+    parser.add_argument("--width", type=int, default=10, help="columns of every maze")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the first maze")
+    parser.add_argument("--loops", type=float, default=0.05, help="share of rooms with an extra door")
+    parser.add_argument("--mines", type=float, default=0.05, help="share of rooms with a mine")
+    args = parser.parse_args(argv)
+    write_maze_file(args.file_path, args.count, args.height, args.width, args.seed, args.loops, args.mines)
+
+if __name__ == '__main__':
+    main()
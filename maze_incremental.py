@@ -0,0 +1,239 @@
+import heapq
+from array import array
+
+from maze_solver import DOWN, END, LEFT, MINE, RIGHT, UP, Maze, _end_rooms
+
+_UNREACHED = 1 << 60
+
+class IncrementalSolver(object):
+    """
+    Class that keeps the search state of one maze between edits, so asking for the shortest path again
+    after a few rooms change only repairs the part of the search those rooms touch.
+    It runs Lifelong Planning A* (LPA*) backwards over (room, lives remaining) states: every end room is a source,
+    the start is the target, and the heuristic is the Manhattan distance to the start room.
+    Every state keeps g, its steps to the nearest end, and rhs, the one step lookahead of g,
+    and only states where the two disagree are queued.
+    Editing a room changes the moves out of it and, through its mine, the lives of the moves into it,
+    so only the states of that room and its four neighbours are looked at again.
+    The path is read off like in MazeIndex, trying up, down, left, then right first,
+    so it is the same path find_shortest_path returns.
+    Edits should go through update_room; if the maze is changed some other way, or its start moves,
+    the search starts over.
+    """
+    __slots__ = ("maze", "lives", "_stride", "_start", "_rooms", "_g", "_rhs", "_queue")
+
+    def __init__(self, maze, lives=3):
+        if isinstance(maze, dict):
+            maze = Maze.from_dict(maze)
+        elif not isinstance(maze, Maze):
+            raise Exception("maze is not a dict!")
+        if not isinstance(lives, int) or isinstance(lives, bool) or lives < 1:
+            raise Exception("lives is not a positive int!")
+        self.maze = maze
+        self.lives = lives
+        self._stride = lives + 1
+        self.reset()
+
+    def reset(self):
+        """
+        Method that throws the kept search state away and queues every end room again
+        """
+        maze = self.maze
+        stride = self._stride
+        self._start = maze.start
+        self._rooms = bytearray(maze.rooms)
+        self._g = array("q", [_UNREACHED]) * (maze.height * maze.width * stride)
+        self._rhs = array("q", [_UNREACHED]) * (maze.height * maze.width * stride)
+        self._queue = []
+        for end in _end_rooms(maze):
+            distance = self._heuristic(end)
+            for lives in range(1, stride):
+                self._rhs[end * stride + lives] = 0
+                self._queue.append((distance, 0, end * stride + lives))
+        heapq.heapify(self._queue)
+
+    def _heuristic(self, room):
+        """
+        Method that returns the Manhattan distance from a room to the start room
+        """
+        row, column = divmod(room, self.maze.width)
+        start_row, start_column = divmod(self._start, self.maze.width)
+        return abs(row - start_row) + abs(column - start_column)
+
+    def _lookahead(self, state):
+        """
+        Method that returns the rhs of a state: 0 in an end room, otherwise one more than the best g of its next states
+        """
+        maze = self.maze
+        width = maze.width
+        rooms = maze.rooms
+        stride = self._stride
+        g = self._g
+        room, room_lives = divmod(state, stride)
+        room_value = rooms[room]
+        if room_value & END:
+            return 0
+        best = _UNREACHED
+        row, column = divmod(room, width)
+        for bit, step, in_bounds in (
+            (UP, -width, row > 0),
+            (DOWN, width, row < maze.height - 1),
+            (LEFT, -1, column > 0),
+            (RIGHT, 1, column < width - 1)
+        ):
+            if not room_value & bit or not in_bounds:
+                continue
+            next_room = room + step
+            next_lives = room_lives - 1 if rooms[next_room] & MINE else room_lives
+            if next_lives > 0 and g[next_room * stride + next_lives] < best:
+                best = g[next_room * stride + next_lives]
+        return best + 1 if best < _UNREACHED else _UNREACHED
+
+    def _update_state(self, state):
+        """
+        Method that works out the rhs of a state again and queues the state when it no longer matches its g.
+        Returns the number of states queued.
+        """
+        rhs = self._lookahead(state)
+        self._rhs[state] = rhs
+        g = self._g[state]
+        if g == rhs:
+            return 0
+        distance = min(g, rhs)
+        heapq.heappush(self._queue, (distance + self._heuristic(state // self._stride), distance, state))
+        return 1
+
+    def update_room(self, room_id, room_value):
+        """
+        Method that changes one room of the maze, see Maze.update_room, and marks the states it affects
+        """
+        maze = self.maze
+        maze.update_room(room_id, room_value)
+        if maze.start != self._start:
+            self.reset()
+            return
+        index = maze.room_index(room_id)
+        self._rooms[index] = room_value
+        row, column = divmod(index, maze.width)
+        affected = [index]
+        if row > 0:
+            affected.append(index - maze.width)
+        if row < maze.height - 1:
+            affected.append(index + maze.width)
+        if column > 0:
+            affected.append(index - 1)
+        if column < maze.width - 1:
+            affected.append(index + 1)
+        for room in affected:
+            for lives in range(1, self._stride):
+                self._update_state(room * self._stride + lives)
+
+    def _compute(self, target, stats=None):
+        """
+        Method that takes states off the queue until the target state is settled.
+        A state whose g is above its rhs takes the rhs and passes it on to the states that step into it,
+        and a state whose g is below its rhs forgets its g and is looked at again with them.
+        Entries whose key went out of date are skipped, as a fresh entry was queued when it changed.
+        """
+        maze = self.maze
+        width = maze.width
+        height = maze.height
+        rooms = maze.rooms
+        stride = self._stride
+        g = self._g
+        rhs = self._rhs
+        queue = self._queue
+        start_row, start_column = divmod(self._start, width)
+        expanded = enqueued = 0
+        while queue:
+            target_distance = min(g[target], rhs[target])
+            first_key, second_key, state = queue[0]
+            if (first_key, second_key) >= (target_distance, target_distance) and g[target] == rhs[target]:
+                break
+            heapq.heappop(queue)
+            state_g = g[state]
+            state_rhs = rhs[state]
+            if state_g == state_rhs:
+                continue
+            distance = min(state_g, state_rhs)
+            room, room_lives = divmod(state, stride)
+            row, column = divmod(room, width)
+            if first_key != distance + abs(row - start_row) + abs(column - start_column) or second_key != distance:
+                continue
+            expanded += 1
+            if state_g > state_rhs:
+                g[state] = state_rhs
+                previous_lives = room_lives + 1 if rooms[room] & MINE else room_lives
+                if previous_lives >= stride:
+                    continue
+                for bit, step, in_bounds in (
+                    (DOWN, -width, row > 0),
+                    (UP, width, row < height - 1),
+                    (RIGHT, -1, column > 0),
+                    (LEFT, 1, column < width - 1)
+                ):
+                    if not in_bounds or not rooms[room + step] & bit:
+                        continue
+                    previous_room = room + step
+                    previous_state = previous_room * stride + previous_lives
+                    if rooms[previous_room] & END or rhs[previous_state] <= state_rhs + 1:
+                        continue
+                    rhs[previous_state] = state_rhs + 1
+                    if g[previous_state] != state_rhs + 1:
+                        previous_distance = min(g[previous_state], state_rhs + 1)
+                        previous_row, previous_column = divmod(previous_room, width)
+                        heapq.heappush(queue, (
+                            previous_distance + abs(previous_row - start_row) + abs(previous_column - start_column),
+                            previous_distance,
+                            previous_state
+                        ))
+                        enqueued += 1
+            else:
+                g[state] = _UNREACHED
+                enqueued += self._update_state(state)
+                previous_lives = room_lives + 1 if rooms[room] & MINE else room_lives
+                if previous_lives >= stride:
+                    continue
+                for bit, step, in_bounds in (
+                    (DOWN, -width, row > 0),
+                    (UP, width, row < height - 1),
+                    (RIGHT, -1, column > 0),
+                    (LEFT, 1, column < width - 1)
+                ):
+                    if in_bounds and rooms[room + step] & bit:
+                        enqueued += self._update_state((room + step) * stride + previous_lives)
+        if stats is not None:
+            stats._record(expanded, enqueued, 0, 0, len(queue))
+
+    def shortest_path(self, stats=None):
+        """
+        Method that repairs the kept search after the edits made since the last call and returns the shortest path.
+        Like find_shortest_path it returns ["N/A"] when there is no path to take.
+        With a SolverStats passed as stats, the states expanded and queued by the repair are added to it.
+        """
+        maze = self.maze
+        if maze.start != self._start or maze.rooms != self._rooms:
+            self.reset()
+        stride = self._stride
+        rooms = maze.rooms
+        start = maze.start
+        start_lives = self.lives - 1 if rooms[start] & MINE else self.lives
+        if start_lives <= 0:
+            return ["N/A"]
+        state = start * stride + start_lives
+        self._compute(state, stats)
+        g = self._g
+        distance = g[state]
+        if distance >= _UNREACHED or distance == 0:
+            return ["N/A"]
+        path = []
+        room, room_lives = divmod(state, stride)
+        while distance:
+            for direction, next_room in maze.neighbors(room):
+                next_lives = room_lives - 1 if rooms[next_room] & MINE else room_lives
+                if next_lives > 0 and g[next_room * stride + next_lives] == distance - 1:
+                    path.append(direction)
+                    room, room_lives = next_room, next_lives
+                    distance -= 1
+                    break
+        return path
@@ -0,0 +1,138 @@
+from array import array
+from collections import deque
+
+from maze_solver import DOWN, LEFT, MINE, RIGHT, UP, Maze, _end_rooms
+
+class MazeIndex(object):
+    """
+    Class that answers many shortest path questions about one maze from a distance field built once.
+    The field holds, for every (room, lives remaining) state, the steps left to the nearest end room,
+    found by one breadth first search backwards from the end rooms.
+    A shortest path from any room is then a walk down the field, in O(path length),
+    that tries up, down, left, then right first, so it is the same path find_shortest_path returns.
+    """
+    __slots__ = ("maze", "max_lives", "_distances")
+
+    def __init__(self, maze, max_lives=3):
+        if isinstance(maze, dict):
+            maze = Maze.from_dict(maze)
+        elif not isinstance(maze, Maze):
+            raise Exception("maze is not a dict!")
+        if not isinstance(max_lives, int) or isinstance(max_lives, bool) or max_lives < 1:
+            raise Exception("max_lives is not a positive int!")
+        self.maze = maze
+        self.max_lives = max_lives
+        self._distances = self._build_distances()
+
+    def _build_distances(self):
+        """
+        Method that runs the backwards breadth first search from every end room with every lives count.
+        A state (room, lives) is stored at room * max_lives + lives - 1 and holds -1 when no end can be reached.
+        """
+        maze = self.maze
+        height = maze.height
+        width = maze.width
+        rooms = maze.rooms
+        max_lives = self.max_lives
+        distances = array("i", [-1]) * (height * width * max_lives)
+        queue = deque()
+        for end in _end_rooms(maze):
+            for lives in range(1, max_lives + 1):
+                distances[end * max_lives + lives - 1] = 0
+                queue.append(end * max_lives + lives - 1)
+        while queue:
+            state = queue.popleft()
+            room, lives_offset = divmod(state, max_lives)
+            previous_lives_offset = lives_offset + 1 if rooms[room] & MINE else lives_offset
+            if previous_lives_offset >= max_lives:
+                continue
+            distance = distances[state] + 1
+            row, column = divmod(room, width)
+            for bit, step, in_bounds in (
+                (DOWN, -width, row > 0),
+                (UP, width, row < height - 1),
+                (RIGHT, -1, column > 0),
+                (LEFT, 1, column < width - 1)
+            ):
+                if not in_bounds or not rooms[room + step] & bit:
+                    continue
+                previous_state = (room + step) * max_lives + previous_lives_offset
+                if distances[previous_state] == -1:
+                    distances[previous_state] = distance
+                    queue.append(previous_state)
+        return distances
+
+    def _state(self, room_id, lives):
+        """
+        Method that returns the state for standing in a room with the given lives, after its mine has gone off,
+        or None when that mine takes the last of them
+        """
+        if not isinstance(lives, int) or isinstance(lives, bool) or lives < 1:
+            raise Exception("lives is not a positive int!")
+        if lives > self.max_lives:
+            raise Exception("lives is above the max_lives of the index!")
+        room = self.maze.start if room_id is None else self.maze.room_index(room_id)
+        lives_left = lives - 1 if self.maze.rooms[room] & MINE else lives
+        if lives_left <= 0:
+            return None
+        return room * self.max_lives + lives_left - 1
+
+    def distance(self, room_id=None, lives=3):
+        """
+        Method that returns the number of steps from a room to the nearest end room, or None if no end can be reached.
+        room_id defaults to the start room.
+        """
+        state = self._state(room_id, lives)
+        if state is None or self._distances[state] == -1:
+            return None
+        return self._distances[state]
+
+    def is_reachable(self, room_id=None, lives=3):
+        """
+        Method that tells whether an end room can be reached from a room with the given lives
+        """
+        return self.distance(room_id, lives) is not None
+
+    def shortest_path(self, room_id=None, lives=3):
+        """
+        Method that walks down the distance field from a room and returns the directions to the nearest end room.
+        Like find_shortest_path it returns ["N/A"] when there is no path to take.
+        room_id defaults to the start room.
+        """
+        state = self._state(room_id, lives)
+        if state is None or self._distances[state] <= 0:
+            return ["N/A"]
+        maze = self.maze
+        max_lives = self.max_lives
+        distances = self._distances
+        path = []
+        room, lives_offset = divmod(state, max_lives)
+        distance = distances[state]
+        while distance:
+            for direction, next_room in maze.neighbors(room):
+                next_lives_offset = lives_offset - 1 if maze.rooms[next_room] & MINE else lives_offset
+                if next_lives_offset >= 0 and distances[next_room * max_lives + next_lives_offset] == distance - 1:
+                    path.append(direction)
+                    room, lives_offset = next_room, next_lives_offset
+                    distance -= 1
+                    break
+        return path
+
+    def shortest_paths(self, queries):
+        """
+        Method that answers a batch of (room_id, lives) queries and returns one shortest path per query
+        """
+        return [self.shortest_path(room_id, lives) for room_id, lives in queries]
+
+    def distances(self, queries):
+        """
+        Method that answers a batch of (room_id, lives) queries and returns one distance per query
+        """
+        return [self.distance(room_id, lives) for room_id, lives in queries]
+
+    @property
+    def nbytes(self):
+        """
+        Memory taken by the distance field in bytes
+        """
+        return self._distances.itemsize * len(self._distances)
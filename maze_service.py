@@ -0,0 +1,425 @@
+import argparse
+import asyncio
+import json
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from maze_solver import find_shortest_path, parse_maze_bytes
+
+logger = logging.getLogger(__name__)
+
+# Requests are one line each, either a maze string or a JSON object such as
+#   {"id": 7, "maze": "(3,3)-[...]", "lives": 3, "timeout": 0.5}
+# and every request gets one JSON line back, in the order the requests came in on the connection:
+#   {"id": 7, "status": "ok", "path": ["up", "left"]}
+#   {"id": 7, "status": "error" | "timeout" | "overloaded", "error": "..."}
+# The id is only echoed back when the request had one.
+_MAX_LINE_BYTES = 64 * 1024 * 1024
+
+def _solve_requests(requests, max_states=None):
+    """
+    Function run by the service workers: parses and solves a batch of (maze line, lives, seconds left) requests.
+    A maze whose rooms times lives plus one, the states a search keeps, is above max_states is not solved.
+    Returns one shortest path per request, or the exception raised while loading or solving it.
+    """
+    results = []
+    for maze_line, lives, timeout in requests:
+        try:
+            maze = parse_maze_bytes(maze_line)
+            if max_states is not None and maze.height * maze.width * (lives + 1) > max_states:
+                raise Exception("maze is too big for its lives budget!")
+            results.append(find_shortest_path(maze, timeout=timeout, lives=lives))
+        except Exception as e:
+            results.append(e)
+    return results
+
+def _read_request(line):
+    """
+    Function that reads one request line and returns its id, maze line, lives and timeout
+    """
+    if not line.lstrip().startswith(b"{"):
+        return None, line, 3, None
+    try:
+        request = json.loads(line)
+    except ValueError:
+        raise Exception("request is not valid JSON!")
+    if not isinstance(request, dict) or not isinstance(request.get("maze"), str):
+        raise Exception("request has no maze string!")
+    lives = request.get("lives", 3)
+    if not isinstance(lives, int) or isinstance(lives, bool) or lives < 1:
+        raise Exception("lives is not a positive int!")
+    timeout = request.get("timeout")
+    if timeout is not None and (not isinstance(timeout, (int, float)) or isinstance(timeout, bool) or timeout <= 0):
+        raise Exception("timeout is not a positive number!")
+    return request.get("id"), request["maze"].encode("ascii", "replace"), lives, timeout
+
+class MazeService(object):
+    """
+    Class that serves shortest paths over TCP from a long lived pool of worker processes,
+    so the interpreter start up and imports are paid once instead of once per maze file.
+    Requests wait in a bounded queue, and once max_pending are waiting new ones are answered
+    as overloaded straight away instead of queueing without limit.
+    The queue is drained in micro batches of up to batch_size requests, waiting batch_delay seconds
+    for a batch to fill, and at most two batches per worker are in flight at once.
+    Every request has a deadline, timeout seconds by default, after which it is answered as timed out,
+    and the seconds it has left are handed to the search so a worker does not keep solving it.
+    Every search keeps a few entries per (room, lives remaining) state, so requests with more than max_lives lives,
+    or whose rooms times lives plus one is above max_states, are answered as errors instead of being solved.
+    When a worker process dies the pool is replaced, and the requests of the batches it took down are solved again
+    one at a time, so only a request that takes its worker down with it again is answered as an error.
+    """
+
+    def __init__(self, host="127.0.0.1", port=0, workers=None, batch_size=16, batch_delay=0.002, max_pending=256,
+                 timeout=10.0, max_lives=64, max_states=1 << 26):
+        if not isinstance(batch_size, int) or isinstance(batch_size, bool) or batch_size < 1:
+            raise Exception("batch_size is not a positive int!")
+        if not isinstance(max_pending, int) or isinstance(max_pending, bool) or max_pending < 1:
+            raise Exception("max_pending is not a positive int!")
+        if timeout is not None and timeout <= 0:
+            raise Exception("timeout is not a positive number!")
+        if not isinstance(max_lives, int) or isinstance(max_lives, bool) or max_lives < 1:
+            raise Exception("max_lives is not a positive int!")
+        if not isinstance(max_states, int) or isinstance(max_states, bool) or max_states < 1:
+            raise Exception("max_states is not a positive int!")
+        self.host = host
+        self.port = port
+        self.workers = workers or os.cpu_count() or 1
+        self.batch_size = batch_size
+        self.batch_delay = batch_delay
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self.max_lives = max_lives
+        self.max_states = max_states
+        self.served = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self.batches = 0
+        self._queue = None
+        self._executor = None
+        self._server = None
+        self._batcher = None
+        self._in_flight = None
+        self._batch_tasks = set()
+
+    async def start(self):
+        """
+        Method that starts the worker pool, warms every worker up and starts listening.
+        With port 0 a free port is picked, and self.port is set to it.
+        """
+        loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue(self.max_pending)
+        self._in_flight = asyncio.Semaphore(self.workers * 2)
+        self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        await asyncio.gather(*(loop.run_in_executor(self._executor, _solve_requests, [])
+                               for _ in range(self.workers)))
+        self._batcher = asyncio.create_task(self._run_batches())
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port,
+                                                  limit=_MAX_LINE_BYTES)
+        self.port = self._server.sockets[0].getsockname()[1]
+        logger.info("Serving mazes on %s:%d with %d workers", self.host, self.port, self.workers)
+        return self
+
+    async def close(self):
+        """
+        Method that stops listening, answers every request still waiting as failed and shuts the worker pool down
+        """
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        if self._batcher is not None:
+            self._batcher.cancel()
+            await asyncio.gather(self._batcher, return_exceptions=True)
+            self._batcher = None
+        while self._queue is not None and not self._queue.empty():
+            future = self._queue.get_nowait()[0]
+            if not future.done():
+                future.set_exception(Exception("service is shutting down!"))
+        await asyncio.gather(*self._batch_tasks, return_exceptions=True)
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+            self._executor = None
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def serve_forever(self):
+        """
+        Method that serves until the task running it is cancelled
+        """
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def solve(self, maze_line, lives=3, timeout=None, request_id=None):
+        """
+        Method that queues one maze line for the workers and returns the response dict for it.
+        timeout defaults to the timeout of the service.
+        """
+        if self._queue is None:
+            raise Exception("service is not started!")
+        if lives > self.max_lives:
+            return self._response(request_id, "error", error="lives is above the limit of {}!".format(self.max_lives))
+        if isinstance(maze_line, str):
+            maze_line = maze_line.encode("ascii", "replace")
+        timeout = self.timeout if timeout is None else timeout
+        loop = asyncio.get_running_loop()
+        deadline = None if timeout is None else loop.time() + timeout
+        future = loop.create_future()
+        try:
+            self._queue.put_nowait((future, maze_line, lives, deadline))
+        except asyncio.QueueFull:
+            self.rejected += 1
+            return self._response(request_id, "overloaded", error="service is overloaded!")
+        try:
+            result = await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            result = TimeoutError("maze was not solved in time!")
+        except Exception as e:
+            result = e
+        if isinstance(result, TimeoutError):
+            self.timed_out += 1
+            return self._response(request_id, "timeout", error=str(result))
+        if isinstance(result, Exception):
+            return self._response(request_id, "error", error=str(result))
+        self.served += 1
+        return self._response(request_id, "ok", path=result)
+
+    @staticmethod
+    def _response(request_id, status, **fields):
+        """
+        Method that builds a response dict, only echoing the id back when the request had one
+        """
+        response = {} if request_id is None else {"id": request_id}
+        response["status"] = status
+        response.update(fields)
+        return response
+
+    async def _run_batches(self):
+        """
+        Method that keeps taking micro batches off the queue and handing them to the worker pool
+        """
+        while True:
+            batch = [await self._queue.get()]
+            if self.batch_delay and self._queue.qsize() < self.batch_size - 1:
+                await asyncio.sleep(self.batch_delay)
+            while len(batch) < self.batch_size and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            await self._in_flight.acquire()
+            task = asyncio.create_task(self._run_batch(batch))
+            self._batch_tasks.add(task)
+            task.add_done_callback(self._batch_tasks.discard)
+
+    async def _run_batch(self, batch):
+        """
+        Method that solves one micro batch on the worker pool and hands every result to the request waiting on it.
+        Requests that were given up on or ran out of time while queued are dropped first.
+        """
+        try:
+            now = asyncio.get_running_loop().time()
+            live = []
+            for future, maze_line, lives, deadline in batch:
+                if future.done():
+                    continue
+                if deadline is not None and deadline <= now:
+                    future.set_exception(TimeoutError("maze was not solved in time!"))
+                    continue
+                live.append((future, (maze_line, lives, None if deadline is None else deadline - now)))
+            if not live:
+                return
+            self.batches += 1
+            try:
+                results = await self._solve_on_pool([request for _, request in live])
+            except BrokenProcessPool:
+                results = await self._solve_alone(live)
+            except Exception as e:
+                results = [e] * len(live)
+            for (future, _), result in zip(live, results):
+                if not future.done():
+                    future.set_result(result)
+        finally:
+            self._in_flight.release()
+
+    async def _solve_on_pool(self, requests):
+        """
+        Method that solves requests on the worker pool, replacing the pool when a worker process died
+        before raising BrokenProcessPool
+        """
+        executor = self._executor
+        if executor is None:
+            raise Exception("service is shutting down!")
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(executor, _solve_requests, requests, self.max_states)
+        except BrokenProcessPool:
+            self._replace_executor(executor)
+            raise
+
+    async def _solve_alone(self, live):
+        """
+        Method that solves the requests of a batch whose worker died one at a time on the new pool.
+        Requests already given up on are skipped.
+        """
+        results = []
+        for future, request in live:
+            if future.done():
+                results.append(None)
+                continue
+            try:
+                results.extend(await self._solve_on_pool([request]))
+            except BrokenProcessPool:
+                results.append(Exception("worker process died while solving the maze!"))
+            except Exception as e:
+                results.append(e)
+        return results
+
+    def _replace_executor(self, broken_executor):
+        """
+        Method that swaps a worker pool broken by a dead worker process for a new one, once per broken pool
+        """
+        if self._executor is not broken_executor:
+            return
+        logger.warning("A worker process died, starting a new worker pool")
+        broken_executor.shutdown(wait=False, cancel_futures=True)
+        self._executor = ProcessPoolExecutor(max_workers=self.workers)
+
+    async def _handle_connection(self, reader, writer):
+        """
+        Method that answers the requests of one connection.
+        Requests are solved concurrently, but their responses are written back in the order they came in,
+        and a client that pipelines more than max_pending requests is not read from until responses go out.
+        """
+        responses = asyncio.Queue(self.max_pending)
+        sender = asyncio.create_task(self._send_responses(responses, writer))
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except ValueError:
+                    await responses.put(self._answer_now(self._response(None, "error",
+                                                                        error="request is too long!")))
+                    break
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+                await responses.put(asyncio.create_task(self._answer(line)))
+        except ConnectionError:
+            pass
+        finally:
+            await responses.put(None)
+            await asyncio.gather(sender, return_exceptions=True)
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def _answer(self, line):
+        """
+        Method that turns one request line into its response dict
+        """
+        try:
+            request_id, maze_line, lives, timeout = _read_request(line)
+        except Exception as e:
+            return self._response(None, "error", error=str(e))
+        return await self.solve(maze_line, lives, timeout, request_id)
+
+    @staticmethod
+    def _answer_now(response):
+        """
+        Method that wraps a response that is already known in a finished future
+        """
+        future = asyncio.get_running_loop().create_future()
+        future.set_result(response)
+        return future
+
+    @staticmethod
+    async def _send_responses(responses, writer):
+        """
+        Method that writes the responses of one connection as JSON lines, in request order.
+        Once the client has gone away the remaining responses are still awaited, but dropped.
+        """
+        connected = True
+        while True:
+            pending = await responses.get()
+            if pending is None:
+                return
+            response = await pending
+            if not connected:
+                continue
+            try:
+                writer.write(json.dumps(response).encode("ascii") + b"\n")
+                await writer.drain()
+            except ConnectionError:
+                connected = False
+
+async def request_paths(host, port, requests):
+    """
+    Function that sends requests to a running maze service over one connection and returns its responses in order.
+    A request is either a maze string or a dict in the JSON request format.
+    """
+    reader, writer = await asyncio.open_connection(host, port, limit=_MAX_LINE_BYTES)
+    try:
+        for request in requests:
+            if isinstance(request, dict):
+                writer.write(json.dumps(request).encode("ascii") + b"\n")
+            else:
+                writer.write(request.encode("ascii") + b"\n")
+        await writer.drain()
+        writer.write_eof()
+        responses = []
+        for _ in requests:
+            line = await reader.readline()
+            if not line:
+                raise Exception("service closed the connection early!")
+            responses.append(json.loads(line))
+        return responses
+    finally:
+        writer.close()
+        await writer.wait_closed()
+
+def _parse_args(argv=None):
+    """
+    Function that reads the command line options of maze_service.py
+    """
+    parser = argparse.ArgumentParser(description="Serve shortest paths of maze strings over TCP.")
+    parser.add_argument("--host", default="127.0.0.1", help="address to listen on")
+    parser.add_argument("--port", type=int, default=8765, help="port to listen on, 0 picks a free one")
+    parser.add_argument("--workers", type=int, default=0, help="worker processes to solve with, 0 uses every CPU")
+    parser.add_argument("--batch-size", type=int, default=16, help="most requests sent to a worker at a time")
+    parser.add_argument("--batch-delay", type=float, default=0.002, help="seconds to wait for a batch to fill")
+    parser.add_argument("--max-pending", type=int, default=256, help="queued requests before new ones are rejected")
+    parser.add_argument("--timeout", type=float, default=10.0, help="default seconds allowed per request")
+    parser.add_argument("--max-lives", type=int, default=64, help="most lives a request may ask for")
+    parser.add_argument("--max-states", type=int, default=1 << 26,
+                        help="most rooms times lives plus one a request may ask to search")
+    parser.add_argument("--verbose", action="store_true", help="log service events")
+    return parser.parse_args(argv)
+
+async def _serve(args):
+    """
+    Function that runs the service with the command line options until it is stopped
+    """
+    async with MazeService(args.host, args.port, args.workers or None, args.batch_size, args.batch_delay,
+                           args.max_pending, args.timeout, args.max_lives, args.max_states) as service:
+        print("Serving mazes on {}:{}".format(service.host, service.port), flush=True)
+        await service.serve_forever()
+
+def main(argv=None):
+    """
+    Main function to run the maze_service.py
+    """
+    args = _parse_args(argv)
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.WARNING, format="%(message)s")
+    try:
+        asyncio.run(_serve(args))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == '__main__':
+    main()
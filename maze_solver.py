@@ -1,4 +1,35 @@
-from collections import deque 
+import argparse
+import heapq
+import importlib
+import importlib.util
+import logging
+import os
+import time
+from array import array
+from collections import deque
+from collections.abc import Mapping
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from itertools import count
+
+logger = logging.getLogger(__name__)
+
+FEATURE_CODES = {
+    "up": 1,
+    "right": 2,
+    "down": 4,
+    "left": 8,
+    "start": 16,
+    "end": 32,
+    "mine": 64
+}
+UP = FEATURE_CODES["up"]
+RIGHT = FEATURE_CODES["right"]
+DOWN = FEATURE_CODES["down"]
+LEFT = FEATURE_CODES["left"]
+START = FEATURE_CODES["start"]
+END = FEATURE_CODES["end"]
+MINE = FEATURE_CODES["mine"]
 
 def decode_room(room_value):
     """
@@ -9,18 +40,9 @@ def decode_room(room_value):
             raise Exception("room_value is not an int!")
         if not 0 <= room_value <= 127:
             raise Exception("room_value is not in range!")
-        feature_codes = {
-            "up": 1,
-            "right": 2,
-            "down": 4,
-            "left": 8,
-            "start": 16,
-            "end": 32,
-            "mine": 64
-        }
         room_object = {}
 
-        for key, val in feature_codes.items():
+        for key, val in FEATURE_CODES.items():
             room_object[key] = False
             if room_value & val != 0:
                 room_object[key] = True
@@ -28,167 +50,1084 @@ def decode_room(room_value):
     except Exception as e:
         raise e
 
+def _encode_room(room_object):
+    """
+    Function that takes a decoded room object and packs it back into its encoded room value
+    """
+    room_value = 0
+    for key, val in FEATURE_CODES.items():
+        if room_object.get(key):
+            room_value |= val
+    return room_value
+
+def _bit_table(bit):
+    """
+    Function that builds a bytes.translate table mapping every encoded room value to 1 if it has the given bit set
+    """
+    return bytes(1 if room_value & bit else 0 for room_value in range(256))
+
+_START_TABLE = _bit_table(START)
+_END_TABLE = _bit_table(END)
+
+class Maze(Mapping):
+    """
+    Class that holds a maze as a packed, row-major buffer of encoded room values.
+    Rooms are addressed by their flat index (i - 1) * width + (j - 1); start and end hold such indexes.
+    Reading the maze like a dict still gives the old maze object shape:
+    room IDs (i, j) map to decoded rooms and "start" maps to the start room ID.
+    """
+    __slots__ = ("height", "width", "rooms", "start", "end")
+
+    def __init__(self, height, width, rooms, start=None):
+        if len(rooms) != height * width:
+            raise Exception("maze does not have {} rooms!".format(height * width))
+        if rooms and max(rooms) > 127:
+            raise Exception("room_value is not in range!")
+        self.height = height
+        self.width = width
+        self.rooms = rooms
+        self.start = rooms.translate(_START_TABLE).rfind(1) if start is None else start
+        self.end = rooms.translate(_END_TABLE).rfind(1)
+        if self.start < 0:
+            raise Exception("no start node was provided!")
+        if self.end < 0:
+            raise Exception("no end node was provided!")
+
+    @classmethod
+    def from_buffer(cls, height, width, rooms, start, end):
+        """
+        Method that wraps an already validated buffer of room values, such as a memoryview, without copying or scanning it
+        """
+        maze = cls.__new__(cls)
+        maze.height = height
+        maze.width = width
+        maze.rooms = rooms
+        maze.start = start
+        maze.end = end
+        return maze
+
+    @classmethod
+    def from_dict(cls, maze_object):
+        """
+        Method that packs an old style maze object (dict of decoded rooms plus "start") into a Maze
+        """
+        room_ids = [key for key in maze_object if key != "start"]
+        height = max(i for i, j in room_ids)
+        width = max(j for i, j in room_ids)
+        rooms = bytearray(height * width)
+        for (i, j) in room_ids:
+            rooms[(i - 1) * width + j - 1] = _encode_room(maze_object[(i, j)])
+        start_i, start_j = maze_object["start"]
+        return cls(height, width, rooms, (start_i - 1) * width + start_j - 1)
+
+    def room_id(self, index):
+        """
+        Method that turns a flat room index into its (i, j) room ID
+        """
+        i, j = divmod(index, self.width)
+        return (i + 1, j + 1)
+
+    def room_index(self, room_id):
+        """
+        Method that turns an (i, j) room ID into its flat room index
+        """
+        i, j = room_id
+        if not (1 <= i <= self.height and 1 <= j <= self.width):
+            raise KeyError(room_id)
+        return (i - 1) * self.width + j - 1
+
+    def neighbors(self, index):
+        """
+        Method that yields (direction, neighbor index) for every open door of a room that stays inside the maze
+        """
+        room_value = self.rooms[index]
+        row, column = divmod(index, self.width)
+        if room_value & UP and row > 0:
+            yield "up", index - self.width
+        if room_value & DOWN and row < self.height - 1:
+            yield "down", index + self.width
+        if room_value & LEFT and column > 0:
+            yield "left", index - 1
+        if room_value & RIGHT and column < self.width - 1:
+            yield "right", index + 1
+
+    def update_room(self, room_id, room_value):
+        """
+        Method that changes the encoded value of one room in place, such as to open a door or add a mine.
+        The start and end move with their bits the way they would when the maze is parsed again.
+        Only a maze over a writable buffer, like the bytearray parse_maze_string builds, can be changed,
+        and a change that would leave the maze without a start or end is undone.
+        """
+        if not isinstance(room_value, int) or isinstance(room_value, bool):
+            raise Exception("room_value is not an int!")
+        if not 0 <= room_value <= 127:
+            raise Exception("room_value is not in range!")
+        index = self.room_index(room_id)
+        old_value = self.rooms[index]
+        try:
+            self.rooms[index] = room_value
+        except TypeError:
+            raise Exception("maze is read only!")
+        start = self.start
+        end = self.end
+        if (old_value ^ room_value) & START:
+            start = bytes(self.rooms).translate(_START_TABLE).rfind(1)
+        if (old_value ^ room_value) & END:
+            end = bytes(self.rooms).translate(_END_TABLE).rfind(1)
+        if start < 0 or end < 0:
+            self.rooms[index] = old_value
+            raise Exception("no start node was provided!" if start < 0 else "no end node was provided!")
+        self.start = start
+        self.end = end
+
+    def to_dict(self):
+        """
+        Method that decodes the whole maze into the old dict of dicts maze object
+        """
+        return dict(self.items())
+
+    def __getitem__(self, key):
+        if key == "start":
+            return self.room_id(self.start)
+        return decode_room(self.rooms[self.room_index(key)])
+
+    def __iter__(self):
+        for i in range(1, self.height + 1):
+            for j in range(1, self.width + 1):
+                yield (i, j)
+        yield "start"
+
+    def __len__(self):
+        return self.height * self.width + 1
+
+    def __reduce__(self):
+        return (Maze, (self.height, self.width, bytearray(self.rooms), self.start))
+
+    def __repr__(self):
+        return "Maze(height={}, width={}, start={}, end={})".format(
+            self.height, self.width, self.room_id(self.start), self.room_id(self.end))
+
+class MazeFormatError(Exception):
+    """
+    Exception raised when a maze string does not follow the (R,C)-[...] format.
+    The offset of the first offending character in the maze string is kept on the exception.
+    """
+    def __init__(self, reason, offset):
+        super().__init__("maze_string is not valid! {} at offset {}".format(reason, offset))
+        self.reason = reason
+        self.offset = offset
+
+    def __reduce__(self):
+        return (MazeFormatError, (self.reason, self.offset))
+
+_SPACES = b" \t\r\n"
+_ROOM_CHARACTERS = b"0123456789," + _SPACES
+_OUT_OF_RANGE_TABLE = bytes(1 if room_value > 127 else 0 for room_value in range(256))
+_CHUNK_SIZE = 1 << 16
+# Longer numbers are out of range anyway, and are rejected before int() sees them, which gives up past 4300 digits
+_MAX_ROOM_DIGITS = 3
+_MAX_NUMBER_DIGITS = 19
+
+def _skip_spaces(data, pos):
+    """
+    Function that returns the offset of the first non whitespace byte at or after pos
+    """
+    while pos < len(data) and data[pos] in _SPACES:
+        pos += 1
+    return pos
+
+def _expect(data, pos, token):
+    """
+    Function that checks the next non whitespace byte is token and returns the offset just past it
+    """
+    pos = _skip_spaces(data, pos)
+    if data[pos:pos + 1] != token:
+        raise MazeFormatError("expected '{}'".format(token.decode()), pos)
+    return pos + 1
+
+def _expect_number(data, pos):
+    """
+    Function that reads the next unsigned number and returns it with the offset just past it
+    """
+    pos = _skip_spaces(data, pos)
+    end = pos
+    while end < len(data) and 48 <= data[end] <= 57:
+        end += 1
+    if end == pos:
+        raise MazeFormatError("expected a number", pos)
+    digits = data[pos:end].lstrip(b"0")
+    if len(digits) > _MAX_NUMBER_DIGITS:
+        raise MazeFormatError("number is too large", pos)
+    return int(digits or b"0"), end
+
+def _token_offset(body, n):
+    """
+    Function that returns the offset of the nth comma separated token in body
+    """
+    offset = 0
+    for _ in range(n):
+        offset = body.index(b",", offset) + 1
+    return offset
+
+def _convert_room_chunk(chunk, chunk_offset):
+    """
+    Function that converts a chunk of room values that failed bulk conversion one value at a time,
+    raising for the first bad one.
+    Leading zeros are dropped before int() sees a value, so long zero padded values still convert.
+    """
+    rooms = bytearray()
+    token_offset = chunk_offset
+    for token in chunk.split(b","):
+        value_offset = _skip_spaces(token, 0)
+        if value_offset == len(token):
+            raise MazeFormatError("expected a room value", token_offset + value_offset)
+        if not token.strip().isdigit():
+            raise MazeFormatError("room value is not a number", token_offset + value_offset)
+        digits = token.strip().lstrip(b"0")
+        if len(digits) > _MAX_ROOM_DIGITS:
+            raise MazeFormatError("room value is not in range", token_offset + value_offset)
+        room_value = int(digits or b"0")
+        if room_value > 127:
+            raise MazeFormatError("room value {} is not in range".format(room_value), token_offset + value_offset)
+        rooms.append(room_value)
+        token_offset += len(token) + 1
+    return rooms
+
+def parse_maze_bytes(data):
+    """
+    Function that parses a maze line given as bytes into a Maze without using eval.
+    Room values are converted in bulk, one chunk at a time, straight into a packed bytearray.
+    Errors are raised as MazeFormatError with the offset of the problem in the line.
+    """
+    if not isinstance(data, (bytes, bytearray)):
+        raise Exception("maze_string is not a string!")
+    pos = _expect(data, 0, b"(")
+    height, pos = _expect_number(data, pos)
+    pos = _expect(data, pos, b",")
+    width, pos = _expect_number(data, pos)
+    pos = _expect(data, pos, b")")
+    pos = _expect(data, pos, b"-")
+    pos = _expect(data, pos, b"[")
+    close = data.find(b"]", pos)
+    if close < 0:
+        raise MazeFormatError("expected ']'", len(data))
+    trailing = _skip_spaces(data, close + 1)
+    if trailing != len(data):
+        raise MazeFormatError("unexpected character", trailing)
+
+    body = data[pos:close]
+    if body.translate(None, _ROOM_CHARACTERS):
+        for idx, character in enumerate(body):
+            if character not in _ROOM_CHARACTERS:
+                raise MazeFormatError("unexpected character", pos + idx)
+
+    rooms = bytearray()
+    if body.strip(_SPACES):
+        chunk_start = 0
+        while chunk_start <= len(body):
+            chunk_end = body.find(b",", chunk_start + _CHUNK_SIZE)
+            if chunk_end < 0:
+                chunk_end = len(body)
+            chunk = body[chunk_start:chunk_end]
+            try:
+                rooms += bytearray(map(int, chunk.split(b",")))
+            except ValueError:
+                rooms += _convert_room_chunk(chunk, pos + chunk_start)
+            chunk_start = chunk_end + 1
+
+    room_count = height * width
+    if len(rooms) > room_count:
+        raise MazeFormatError("expected {} rooms but found {}".format(room_count, len(rooms)),
+                              pos + _token_offset(body, room_count))
+    if len(rooms) < room_count:
+        raise MazeFormatError("expected {} rooms but found {}".format(room_count, len(rooms)), close)
+    out_of_range = rooms.translate(_OUT_OF_RANGE_TABLE).find(1)
+    if out_of_range >= 0:
+        raise MazeFormatError("room value {} is not in range".format(rooms[out_of_range]),
+                              _skip_spaces(data, pos + _token_offset(body, out_of_range)))
+
+    return Maze(height, width, rooms)
+
 def parse_maze_string(maze_string):
     """
-    Function that parses a maze string into a maze object. 
-    The maze object is a Dict with keys being the room IDs.
+    Function that parses a maze string into a maze object.
+    The maze object is a Maze holding the packed room values, which reads like a Dict with keys being the room IDs.
     Room IDs are tuple as such (i, j) representing room in row i and column j
     """
     try:
         if not isinstance(maze_string, str):
             raise Exception("maze_string is not a string!")
-        maze_info = maze_string.split("-")
-        if len(maze_info) != 2:
-            raise Exception("maze_string is not valid!")
         try:
-            maze_dimensions = eval(maze_info[0])
-            maze_rooms = eval(maze_info[1])
-        except Exception:
-            raise Exception("maze_string is not valid!")
-        maze_object = {}
-        start_node = None
-        end_node = None
-        for i in range(1, int(maze_dimensions[0]) + 1):
-            for j in range(1, int(maze_dimensions[1]) + 1):
-                maze_object[(i, j)] = decode_room(int(maze_rooms[((i - 1) * int(maze_dimensions[1])) + j - 1]))
-                if maze_object[(i, j)]["start"]:
-                    start_node = (i,j)
-
-                if maze_object[(i, j)]["end"]:
-                    end_node = (i,j)
-
-        if not start_node:
-            raise Exception("no start node was provided!")
-
-        if not end_node:
-            raise Exception("no end node was provided!")
-
-        maze_object["start"] = start_node
-
-        return maze_object
+            data = maze_string.encode("ascii")
+        except UnicodeEncodeError as e:
+            raise MazeFormatError("unexpected character", e.start)
+        return parse_maze_bytes(data)
     except Exception as e:
         raise e
 
+_READ_BUFFER_SIZE = 1 << 20
+
+def iter_mazes(maze_file_path):
+    """
+    Generator which reads the maze file line by line through a large read buffer and yields one parsed maze at a time.
+    Lines that cannot be parsed yield their exception instead of a maze, and blank lines are skipped.
+    Only the maze being parsed is held in memory, so files of any size can be streamed.
+    Progress is logged at debug level.
+    """
+    if not isinstance(maze_file_path, str):
+        raise Exception("maze_file_path is not a string!")
+    with open(maze_file_path, "rb", buffering=_READ_BUFFER_SIZE) as f:
+        for idx, maze_line in enumerate(f):
+            if not maze_line.strip():
+                continue
+            try:
+                maze = parse_maze_bytes(maze_line)
+                logger.debug("Loaded maze on line %d: %r", idx + 1, maze)
+            except Exception as e:
+                logger.debug("There was an error loading maze on line %d: %s", idx + 1, e)
+                maze = e
+            yield maze
+
 def make_mazes(maze_file_path):
     """
     Function which takes the maze file with many mazes and parses them into an an array of maze_objects.
+    Mazes that cannot be parsed are left out.
     """
     try:
         if not isinstance(maze_file_path, str):
             raise Exception("maze_file_path is not a string!")
-        mazes = []
-        with open(maze_file_path, "r") as f:
-            for idx, maze_string in enumerate(f):
-                try:
-                    print("Loading in maze #{}:\n{}".format(idx + 1, maze_string))
-                    mazes.append(parse_maze_string(maze_string))
-                    print("Maze Loaded!\n")
-                except Exception as e:
-                    print("There was an error loading maze: {}\n".format(e))
-
-        return mazes
+        return [maze for maze in iter_mazes(maze_file_path) if isinstance(maze, Maze)]
     except Exception as e:
         raise e
 
-def find_shortest_path(maze):
+class SolverStats(object):
     """
-    Function that searches for the shortest path in a given maze.
-    It is using an enhanced version of an ordinary breadth first search.
-    If a path cannot be found it will be printed out to the user.
+    Class that collects what a search did: per phase timers, counters and optional event hooks.
+    Pass one to find_shortest_path to have it filled in; counters add up over every search it is passed to.
+    The hooks, when given, are called with the room ID and lives remaining of a state:
+    on_expand when a state is taken off the queue, on_enqueue when one is put on it and on_goal when an end is reached.
+    Searches run without a SolverStats never look at hooks, and the default breadth first search does no counting either.
     """
-    try:
-        lives = 3
-        if not isinstance(maze, dict):
-            raise Exception("maze is not a dict!")
-        queue = deque()
-        start_node = maze["start"]
-        path = []
-        visited = set([])
-        q_object = {
-            "node": start_node,
-            "lives": lives,
-            "path": path,
-            "visited": visited
+    __slots__ = ("expanded", "enqueued", "pruned_visited", "pruned_lives", "queue_peak", "timings",
+                 "on_expand", "on_enqueue", "on_goal", "_inner_seconds")
+
+    def __init__(self, on_expand=None, on_enqueue=None, on_goal=None):
+        self.expanded = 0
+        self.enqueued = 0
+        self.pruned_visited = 0
+        self.pruned_lives = 0
+        self.queue_peak = 0
+        self.timings = {}
+        self.on_expand = on_expand
+        self.on_enqueue = on_enqueue
+        self.on_goal = on_goal
+        self._inner_seconds = []
+
+    @contextmanager
+    def phase(self, name):
+        """
+        Method that times the block it wraps and adds the seconds to the timer of the named phase.
+        The seconds of a phase started inside another are left out of the outer one, so the timers add up.
+        """
+        started = time.perf_counter()
+        self._inner_seconds.append(0.0)
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - started
+            self.timings[name] = self.timings.get(name, 0.0) + seconds - self._inner_seconds.pop()
+            if self._inner_seconds:
+                self._inner_seconds[-1] += seconds
+
+    def _record(self, expanded, enqueued, pruned_visited, pruned_lives, queue_peak):
+        """
+        Method that adds the counters of one search
+        """
+        self.expanded += expanded
+        self.enqueued += enqueued
+        self.pruned_visited += pruned_visited
+        self.pruned_lives += pruned_lives
+        self.queue_peak = max(self.queue_peak, queue_peak)
+
+    def as_dict(self):
+        """
+        Method that returns the counters and timers as a plain dict
+        """
+        return {
+            "expanded": self.expanded,
+            "enqueued": self.enqueued,
+            "pruned_visited": self.pruned_visited,
+            "pruned_lives": self.pruned_lives,
+            "queue_peak": self.queue_peak,
+            "timings": dict(self.timings)
         }
-        queue.append(q_object)
-        while queue:
-            current_queue_object = queue.popleft()
-            current_node_object = maze[current_queue_object["node"]]
 
-            if current_queue_object["node"] in current_queue_object["visited"]:
+    def __repr__(self):
+        return "SolverStats({})".format(self.as_dict())
+
+def _hooks(maze, stats):
+    """
+    Function that returns the on_expand, on_enqueue and on_goal hooks of stats as functions of a flat room index,
+    with None for every hook that is not set
+    """
+    if stats is None:
+        return None, None, None
+    return tuple(
+        None if hook is None else (lambda room, lives, hook=hook: hook(maze.room_id(room), lives))
+        for hook in (stats.on_expand, stats.on_enqueue, stats.on_goal)
+    )
+
+_DEADLINE_POLL = 4096
+
+def _check_deadline(deadline):
+    """
+    Function that raises a TimeoutError once the monotonic clock has passed the deadline
+    """
+    if deadline is not None and time.monotonic() > deadline:
+        raise TimeoutError("maze was not solved in time!")
+
+def _search_states(maze, lives, deadline=None, stats=None):
+    """
+    Function that runs a breadth first search over (room, lives remaining) states.
+    Every state is stored once in a flat parent table indexed by room * (lives + 1) + lives remaining,
+    so the direction list is only rebuilt when the end room is reached.
+    The deadline is polled every few thousand states.
+    With a SolverStats the search runs in _search_states_traced, so without one the loop does no counting at all.
+    Returns the path, or None if the end cannot be reached, and the lives remaining at the end.
+    """
+    if stats is not None:
+        return _search_states_traced(maze, lives, deadline, stats)
+    height = maze.height
+    width = maze.width
+    rooms = maze.rooms
+    stride = lives + 1
+    start = maze.start
+    start_lives = lives - 1 if rooms[start] & MINE else lives
+    if start_lives <= 0:
+        return None, 0
+    start_state = start * stride + start_lives
+    if rooms[start] & END:
+        return [], start_lives
+    parents = array("l", [-1]) * (height * width * stride)
+    parents[start_state] = start_state
+    queue = deque([start_state])
+    polls = _DEADLINE_POLL
+    while queue:
+        polls -= 1
+        if not polls:
+            polls = _DEADLINE_POLL
+            _check_deadline(deadline)
+        state = queue.popleft()
+        room, room_lives = divmod(state, stride)
+        room_value = rooms[room]
+        row, column = divmod(room, width)
+        for bit, step, in_bounds in (
+            (UP, -width, row > 0),
+            (DOWN, width, row < height - 1),
+            (LEFT, -1, column > 0),
+            (RIGHT, 1, column < width - 1)
+        ):
+            if not room_value & bit or not in_bounds:
                 continue
-            else:
-                current_queue_object["visited"].add(current_queue_object["node"])
-            if current_node_object["mine"]:
-                current_queue_object["lives"] -= 1
-            if current_queue_object["lives"] <= 0:
+            next_room = room + step
+            next_value = rooms[next_room]
+            next_lives = room_lives - 1 if next_value & MINE else room_lives
+            if next_lives <= 0:
+                continue
+            next_state = next_room * stride + next_lives
+            if parents[next_state] != -1:
+                continue
+            parents[next_state] = state
+            if next_value & END:
+                return _rebuild_path(parents, next_state, stride, width), next_lives
+            queue.append(next_state)
+    return None, 0
+
+def _search_states_traced(maze, lives, deadline, stats):
+    """
+    Function that runs the same breadth first search as _search_states while counting into stats and calling its hooks
+    """
+    height = maze.height
+    width = maze.width
+    rooms = maze.rooms
+    stride = lives + 1
+    start = maze.start
+    start_lives = lives - 1 if rooms[start] & MINE else lives
+    if start_lives <= 0:
+        return None, 0
+    start_state = start * stride + start_lives
+    if rooms[start] & END:
+        return [], start_lives
+    on_expand, on_enqueue, on_goal = _hooks(maze, stats)
+    parents = array("l", [-1]) * (height * width * stride)
+    parents[start_state] = start_state
+    queue = deque([start_state])
+    expanded = enqueued = pruned_visited = pruned_lives = 0
+    queue_peak = 1
+    path = None
+    polls = _DEADLINE_POLL
+    while queue:
+        polls -= 1
+        if not polls:
+            polls = _DEADLINE_POLL
+            _check_deadline(deadline)
+        state = queue.popleft()
+        expanded += 1
+        room, room_lives = divmod(state, stride)
+        if on_expand is not None:
+            on_expand(room, room_lives)
+        room_value = rooms[room]
+        row, column = divmod(room, width)
+        for bit, step, in_bounds in (
+            (UP, -width, row > 0),
+            (DOWN, width, row < height - 1),
+            (LEFT, -1, column > 0),
+            (RIGHT, 1, column < width - 1)
+        ):
+            if not room_value & bit or not in_bounds:
+                continue
+            next_room = room + step
+            next_value = rooms[next_room]
+            next_lives = room_lives - 1 if next_value & MINE else room_lives
+            if next_lives <= 0:
+                pruned_lives += 1
                 continue
-            if current_node_object["end"]:
-                path = current_queue_object["path"]
+            next_state = next_room * stride + next_lives
+            if parents[next_state] != -1:
+                pruned_visited += 1
+                continue
+            parents[next_state] = state
+            if next_value & END:
+                if on_goal is not None:
+                    on_goal(next_room, next_lives)
+                path = _rebuild_path(parents, next_state, stride, width)
                 break
+            queue.append(next_state)
+            enqueued += 1
+            if on_enqueue is not None:
+                on_enqueue(next_room, next_lives)
+        if path is not None:
+            break
+        if len(queue) > queue_peak:
+            queue_peak = len(queue)
+    stats._record(expanded, enqueued, pruned_visited, pruned_lives, queue_peak)
+    if path is None:
+        return None, 0
+    return path, next_lives
 
-            if current_node_object["up"]:
-                new_path = list(current_queue_object["path"])
-                new_path.append('up')
-                queue.append({
-                    "node": (int(current_queue_object["node"][0]) - 1, int(current_queue_object["node"][1])),
-                    "lives": int(current_queue_object["lives"]),
-                    "path": new_path,
-                    "visited": set(current_queue_object["visited"])
-                })
-
-            if current_node_object["down"]:
-                new_path = list(current_queue_object["path"])
-                new_path.append('down')
-                queue.append({
-                    "node": (int(current_queue_object["node"][0]) + 1, int(current_queue_object["node"][1])),
-                    "lives": int(current_queue_object["lives"]),
-                    "path": new_path,
-                    "visited": set(current_queue_object["visited"])
-                })
-                
-            if current_node_object["left"]:
-                new_path = list(current_queue_object["path"])
-                new_path.append('left')
-                queue.append({
-                    "node": (int(current_queue_object["node"][0]), int(current_queue_object["node"][1]) - 1),
-                    "lives": int(current_queue_object["lives"]),
-                    "path": new_path,
-                    "visited": set(current_queue_object["visited"])
-                })
-
-            if current_node_object["right"]:
-                new_path = list(current_queue_object["path"])
-                new_path.append('right')
-                queue.append({
-                    "node": (int(current_queue_object["node"][0]), int(current_queue_object["node"][1]) + 1),
-                    "lives": int(current_queue_object["lives"]),
-                    "path": new_path,
-                    "visited": set(current_queue_object["visited"])
-                })
+def _end_rooms(maze):
+    """
+    Function that returns the flat indexes of every end room of a maze
+    """
+    ends = bytes(maze.rooms).translate(_END_TABLE)
+    end_rooms = []
+    end = ends.find(1)
+    while end >= 0:
+        end_rooms.append(end)
+        end = ends.find(1, end + 1)
+    return end_rooms
 
-        if not path:
-            path = ["N/A"]
-            print("We couldn't find a path through in the map\n")
+def _search_astar(maze, lives, deadline=None, stats=None):
+    """
+    Function that runs an A* search over (room, lives remaining) states.
+    The heuristic is the Manhattan distance to the box around the end rooms,
+    which never overestimates and stays consistent, so every state is expanded at most once.
+    Returns the path, or None if the end cannot be reached, and the lives remaining at the end.
+    """
+    height = maze.height
+    width = maze.width
+    rooms = maze.rooms
+    stride = lives + 1
+    start = maze.start
+    start_lives = lives - 1 if rooms[start] & MINE else lives
+    if start_lives <= 0:
+        return None, 0
+    start_state = start * stride + start_lives
+    if rooms[start] & END:
+        return [], start_lives
+    ends = _end_rooms(maze)
+    end_rows = [end // width for end in ends]
+    end_columns = [end % width for end in ends]
+    first_row, last_row, first_column, last_column = min(end_rows), max(end_rows), min(end_columns), max(end_columns)
+
+    def heuristic(room):
+        row, column = divmod(room, width)
+        return max(first_row - row, 0, row - last_row) + max(first_column - column, 0, column - last_column)
+
+    on_expand, on_enqueue, on_goal = _hooks(maze, stats)
+    parents = array("l", [-1]) * (height * width * stride)
+    costs = array("l", [-1]) * (height * width * stride)
+    parents[start_state] = start_state
+    costs[start_state] = 0
+    heap = [(heuristic(start), 0, start_state)]
+    expanded = enqueued = pruned_visited = pruned_lives = 0
+    queue_peak = 1
+    path = None
+    polls = _DEADLINE_POLL
+    while heap:
+        polls -= 1
+        if not polls:
+            polls = _DEADLINE_POLL
+            _check_deadline(deadline)
+        _, negative_cost, state = heapq.heappop(heap)
+        cost = -negative_cost
+        if cost != costs[state]:
+            continue
+        room, room_lives = divmod(state, stride)
+        room_value = rooms[room]
+        if room_value & END:
+            if on_goal is not None:
+                on_goal(room, room_lives)
+            path = _rebuild_path(parents, state, stride, width)
+            break
+        expanded += 1
+        if on_expand is not None:
+            on_expand(room, room_lives)
+        row, column = divmod(room, width)
+        for bit, step, in_bounds in (
+            (UP, -width, row > 0),
+            (DOWN, width, row < height - 1),
+            (LEFT, -1, column > 0),
+            (RIGHT, 1, column < width - 1)
+        ):
+            if not room_value & bit or not in_bounds:
+                continue
+            next_room = room + step
+            next_lives = room_lives - 1 if rooms[next_room] & MINE else room_lives
+            if next_lives <= 0:
+                pruned_lives += 1
+                continue
+            next_state = next_room * stride + next_lives
+            if costs[next_state] != -1 and costs[next_state] <= cost + 1:
+                pruned_visited += 1
+                continue
+            costs[next_state] = cost + 1
+            parents[next_state] = state
+            heapq.heappush(heap, (cost + 1 + heuristic(next_room), -(cost + 1), next_state))
+            enqueued += 1
+            if on_enqueue is not None:
+                on_enqueue(next_room, next_lives)
+        if len(heap) > queue_peak:
+            queue_peak = len(heap)
+    if stats is not None:
+        stats._record(expanded, enqueued, pruned_visited, pruned_lives, queue_peak)
+    if path is None:
+        return None, 0
+    return path, room_lives
+
+def _search_bidirectional(maze, lives, deadline=None, stats=None):
+    """
+    Function that runs a breadth first search from the start and one backwards from the end rooms at the same time,
+    always growing the smaller frontier by a whole level.
+    Forward states are (room, lives remaining) and backward states are (room, mines between the room and the end),
+    so two halves only join when the mines of the whole path still leave at least one of the lives.
+    The search stops once the two depths add up to the best joined path found.
+    Hooks see backward states with the mines still ahead in place of the lives remaining.
+    Returns the path, or None if the end cannot be reached, and the lives remaining at the end.
+    """
+    height = maze.height
+    width = maze.width
+    rooms = maze.rooms
+    stride = lives + 1
+    start = maze.start
+    start_lives = lives - 1 if rooms[start] & MINE else lives
+    if start_lives <= 0:
+        return None, 0
+    start_state = start * stride + start_lives
+    if rooms[start] & END:
+        return [], start_lives
+    on_expand, on_enqueue, on_goal = _hooks(maze, stats)
+    state_count = height * width * stride
+    forward_parents = array("l", [-1]) * state_count
+    forward_costs = array("l", [-1]) * state_count
+    backward_parents = array("l", [-1]) * state_count
+    backward_costs = array("l", [-1]) * state_count
+    forward_parents[start_state] = start_state
+    forward_costs[start_state] = 0
+    forward_frontier = [start_state]
+    backward_frontier = []
+    for end in _end_rooms(maze):
+        backward_parents[end * stride] = end * stride
+        backward_costs[end * stride] = 0
+        backward_frontier.append(end * stride)
+
+    best_cost = -1
+    best_forward = best_backward = -1
+    forward_depth = backward_depth = 0
+    expanded = enqueued = pruned_visited = pruned_lives = 0
+    queue_peak = len(forward_frontier) + len(backward_frontier)
+    polls = _DEADLINE_POLL
+    while forward_frontier and backward_frontier and (best_cost < 0 or forward_depth + backward_depth < best_cost):
+        next_frontier = []
+        if len(forward_frontier) <= len(backward_frontier):
+            for state in forward_frontier:
+                polls -= 1
+                if not polls:
+                    polls = _DEADLINE_POLL
+                    _check_deadline(deadline)
+                expanded += 1
+                room, room_lives = divmod(state, stride)
+                if on_expand is not None:
+                    on_expand(room, room_lives)
+                room_value = rooms[room]
+                row, column = divmod(room, width)
+                for bit, step, in_bounds in (
+                    (UP, -width, row > 0),
+                    (DOWN, width, row < height - 1),
+                    (LEFT, -1, column > 0),
+                    (RIGHT, 1, column < width - 1)
+                ):
+                    if not room_value & bit or not in_bounds:
+                        continue
+                    next_room = room + step
+                    next_value = rooms[next_room]
+                    next_lives = room_lives - 1 if next_value & MINE else room_lives
+                    if next_lives <= 0:
+                        pruned_lives += 1
+                        continue
+                    next_state = next_room * stride + next_lives
+                    if forward_parents[next_state] != -1:
+                        pruned_visited += 1
+                        continue
+                    forward_parents[next_state] = state
+                    forward_costs[next_state] = forward_depth + 1
+                    for mines in range(next_lives):
+                        backward_cost = backward_costs[next_room * stride + mines]
+                        if backward_cost != -1 and (best_cost < 0 or forward_depth + 1 + backward_cost < best_cost):
+                            best_cost = forward_depth + 1 + backward_cost
+                            best_forward = next_state
+                            best_backward = next_room * stride + mines
+                    if not next_value & END:
+                        next_frontier.append(next_state)
+                        enqueued += 1
+                        if on_enqueue is not None:
+                            on_enqueue(next_room, next_lives)
+            forward_frontier = next_frontier
+            forward_depth += 1
         else:
-            print("We found a path through in the map with {} lives: {}\n".format(current_queue_object["lives"], path))
+            for state in backward_frontier:
+                polls -= 1
+                if not polls:
+                    polls = _DEADLINE_POLL
+                    _check_deadline(deadline)
+                expanded += 1
+                room, mines = divmod(state, stride)
+                if on_expand is not None:
+                    on_expand(room, mines)
+                row, column = divmod(room, width)
+                previous_mines = mines + 1 if rooms[room] & MINE else mines
+                if previous_mines >= lives:
+                    pruned_lives += 1
+                    continue
+                for bit, step, in_bounds in (
+                    (DOWN, -width, row > 0),
+                    (UP, width, row < height - 1),
+                    (RIGHT, -1, column > 0),
+                    (LEFT, 1, column < width - 1)
+                ):
+                    if not in_bounds:
+                        continue
+                    previous_room = room + step
+                    previous_value = rooms[previous_room]
+                    if not previous_value & bit or previous_value & END:
+                        continue
+                    previous_state = previous_room * stride + previous_mines
+                    if backward_parents[previous_state] != -1:
+                        pruned_visited += 1
+                        continue
+                    backward_parents[previous_state] = state
+                    backward_costs[previous_state] = backward_depth + 1
+                    for room_lives in range(previous_mines + 1, stride):
+                        forward_cost = forward_costs[previous_room * stride + room_lives]
+                        if forward_cost != -1 and (best_cost < 0 or forward_cost + backward_depth + 1 < best_cost):
+                            best_cost = forward_cost + backward_depth + 1
+                            best_forward = previous_room * stride + room_lives
+                            best_backward = previous_state
+                    next_frontier.append(previous_state)
+                    enqueued += 1
+                    if on_enqueue is not None:
+                        on_enqueue(previous_room, previous_mines)
+            backward_frontier = next_frontier
+            backward_depth += 1
+        queue_peak = max(queue_peak, len(forward_frontier) + len(backward_frontier))
+
+    if stats is not None:
+        stats._record(expanded, enqueued, pruned_visited, pruned_lives, queue_peak)
+    if best_cost < 0:
+        return None, 0
+    path = _rebuild_path(forward_parents, best_forward, stride, width)
+    state = best_backward
+    while backward_parents[state] != state:
+        next_state = backward_parents[state]
+        path.append(_step_direction(next_state // stride - state // stride, width))
+        state = next_state
+    if on_goal is not None:
+        on_goal(state // stride, best_forward % stride - best_backward % stride)
+    return path, best_forward % stride - best_backward % stride
+
+def _step_direction(step, width):
+    """
+    Function that names the direction of a step between two flat room indexes
+    """
+    if step == -width:
+        return "up"
+    if step == width:
+        return "down"
+    if step == -1:
+        return "left"
+    return "right"
+
+def _rebuild_path(parents, state, stride, width):
+    """
+    Function that walks the parent table back from a state to the start and returns the directions taken
+    """
+    path = []
+    while parents[state] != state:
+        parent = parents[state]
+        path.append(_step_direction(state // stride - parent // stride, width))
+        state = parent
+    path.reverse()
+    return path
 
+_STRATEGIES = {
+    "bfs": _search_states,
+    "astar": _search_astar,
+    "bidirectional": _search_bidirectional
+}
+
+# Engines that live in their own module are only imported when asked for,
+# by module, function and the package they need that may not be installed
+_OPTIONAL_STRATEGIES = {
+    "wavefront": ("maze_wavefront", "search_wavefront", "numpy"),
+    "contracted": ("maze_contract", "search_contracted", None)
+}
+
+def _get_strategy(strategy):
+    """
+    Function that returns the search engine registered under a strategy name
+    """
+    if strategy in _STRATEGIES:
+        return _STRATEGIES[strategy]
+    if strategy in _OPTIONAL_STRATEGIES:
+        module_name, function_name, _ = _OPTIONAL_STRATEGIES[strategy]
+        return getattr(importlib.import_module(module_name), function_name)
+    raise Exception("strategy is not a known strategy!")
+
+def available_strategies():
+    """
+    Function that lists the strategies find_shortest_path can use here, leaving out those missing a dependency
+    """
+    strategies = list(_STRATEGIES)
+    for strategy, (_, _, dependency) in _OPTIONAL_STRATEGIES.items():
+        if dependency is None or importlib.util.find_spec(dependency) is not None:
+            strategies.append(strategy)
+    return strategies
+
+def find_shortest_path(maze, timeout=None, lives=3, strategy="bfs", stats=None):
+    """
+    Function that searches for the shortest path in a given maze.
+    By default it is using a breadth first search over (room, lives remaining) states,
+    so every state is only ever visited once.
+    strategy picks the search engine: "bfs", "astar", "bidirectional", "contracted" or,
+    when NumPy is installed, "wavefront".
+    All of them find a path of the same length, but when several paths tie only "bfs" and "contracted"
+    are sure to pick the one that tries up, down, left, then right first.
+    The maze can be a Maze or an old style dict maze object, which is packed first.
+    Every mine entered costs one of the lives, and a path must end with at least one left.
+    With a timeout in seconds a TimeoutError is raised if the search runs longer than that.
+    With a SolverStats passed as stats, the timers, counters and hooks of the search are filled in.
+    """
+    try:
+        if not isinstance(lives, int) or isinstance(lives, bool) or lives < 1:
+            raise Exception("lives is not a positive int!")
+        search = _get_strategy(strategy)
+        if isinstance(maze, dict):
+            if stats is None:
+                maze = Maze.from_dict(maze)
+            else:
+                with stats.phase("pack"):
+                    maze = Maze.from_dict(maze)
+        elif not isinstance(maze, Maze):
+            raise Exception("maze is not a dict!")
+        deadline = None if timeout is None else time.monotonic() + timeout
+        if stats is None:
+            path, lives_left = search(maze, lives, deadline)
+        else:
+            with stats.phase("search"):
+                path, lives_left = search(maze, lives, deadline, stats)
+
+        if not path:
+            logger.debug("We couldn't find a path through in the map")
+            return ["N/A"]
+        logger.debug("We found a path through in the map with %d lives: %s", lives_left, path)
         return path
 
     except Exception as e:
         raise e
 
-def main():
+def _open_cache(cache_path):
+    """
+    Function that opens the persistent solution cache at cache_path, or returns None when there is no cache_path
+    """
+    if cache_path is None:
+        return None
+    from maze_cache import SolutionCache
+    return SolutionCache(store_path=cache_path)
+
+def solve_stream(maze_file_path, timeout=None, cache_path=None, stats_callback=None):
+    """
+    Generator which solves the mazes of a maze file one at a time and yields each shortest path as soon as it is found.
+    Lines that cannot be parsed, and mazes not solved within timeout seconds, yield their exception instead of a path.
+    With a cache_path, paths are looked up in and saved to the persistent solution cache there.
+    With a stats_callback, every maze is solved with its own SolverStats, timing the parse as well,
+    and stats_callback(maze number, stats) is called before its path is yielded.
+    """
+    cache = _open_cache(cache_path)
+    mazes = iter_mazes(maze_file_path)
+    try:
+        for idx in count():
+            stats = None if stats_callback is None else SolverStats()
+            if stats is None:
+                maze = next(mazes, None)
+            else:
+                with stats.phase("parse"):
+                    maze = next(mazes, None)
+            if maze is None:
+                break
+            if isinstance(maze, Exception):
+                yield maze
+                continue
+            try:
+                if cache is None:
+                    shortest_path = find_shortest_path(maze, timeout, stats=stats)
+                else:
+                    shortest_path = cache.solve(maze, timeout=timeout, stats=stats)
+            except TimeoutError as e:
+                shortest_path = e
+            if stats_callback is not None:
+                stats_callback(idx + 1, stats)
+            yield shortest_path
+    finally:
+        if cache is not None:
+            cache.close()
+
+_worker_cache = None
+
+def _open_worker_cache(cache_path):
+    """
+    Function run once when a batch worker starts: opens the solution cache the worker keeps for all of its chunks,
+    so its in memory LRU is shared across them.
+    Paths are committed as soon as they are saved, so the cache does not need closing when the worker exits.
+    """
+    global _worker_cache
+    _worker_cache = _open_cache(cache_path)
+
+def _solve_maze_lines(maze_lines, timeout=None):
+    """
+    Function run by the batch workers: parses and solves a chunk of raw maze lines,
+    through the solution cache of the worker when it has one.
+    Returns one shortest path per line, or the exception raised while loading or solving it.
+    """
+    solve = find_shortest_path if _worker_cache is None else _worker_cache.solve
+    results = []
+    for maze_line in maze_lines:
+        try:
+            results.append(solve(parse_maze_bytes(maze_line), timeout=timeout))
+        except Exception as e:
+            results.append(e)
+    return results
+
+def _iter_maze_line_chunks(maze_file_path, chunk_size):
+    """
+    Generator which reads the maze file and yields lists of up to chunk_size non blank raw maze lines
+    """
+    chunk = []
+    with open(maze_file_path, "rb", buffering=_READ_BUFFER_SIZE) as f:
+        for maze_line in f:
+            if not maze_line.strip():
+                continue
+            chunk.append(maze_line)
+            if len(chunk) == chunk_size:
+                yield chunk
+                chunk = []
+    if chunk:
+        yield chunk
+
+def _map_chunks_in_order(function, tasks, workers=None, initializer=None, initargs=()):
+    """
+    Generator which runs function(*task) for every task on a pool of worker processes.
+    Each call returns a list of results, which are yielded one by one in task order.
+    Only two tasks per worker are in flight at once, so tasks are pulled lazily.
+    initializer(*initargs), when given, is run once in every worker as it starts.
+    """
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers, initializer=initializer, initargs=initargs) as executor:
+        pending = deque()
+        for task in tasks:
+            pending.append(executor.submit(function, *task))
+            if len(pending) >= workers * 2:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+def solve_batch(maze_file_path, workers=None, chunk_size=64, timeout=None, cache_path=None):
+    """
+    Generator which solves the mazes of a maze file across a pool of worker processes.
+    Raw maze lines are sent to the workers in chunks of chunk_size, so mazes are parsed where they are solved,
+    and only a few chunks per worker are in flight at once to keep memory flat.
+    Shortest paths are yielded in input order as soon as they are ready.
+    A maze that fails to load or is not solved within timeout seconds yields its exception instead.
+    With a cache_path, every worker opens the persistent solution cache there once and keeps it for all its chunks.
+    """
+    if not isinstance(maze_file_path, str):
+        raise Exception("maze_file_path is not a string!")
+    if not isinstance(chunk_size, int) or chunk_size < 1:
+        raise Exception("chunk_size is not a positive int!")
+    tasks = ((chunk, timeout) for chunk in _iter_maze_line_chunks(maze_file_path, chunk_size))
+    yield from _map_chunks_in_order(_solve_maze_lines, tasks, workers, _open_worker_cache, (cache_path,))
+
+def _parse_args(argv=None):
+    """
+    Function that reads the command line options of maze_solver.py
+    """
+    parser = argparse.ArgumentParser(description="Find the shortest path through every maze in a maze file.")
+    parser.add_argument("file_path", nargs="?", default="mazes.txt", help="maze file with one maze per line")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="worker processes to solve with, 0 uses every CPU (default: 1, no pool)")
+    parser.add_argument("--chunk-size", type=int, default=64, help="mazes sent to a worker at a time")
+    parser.add_argument("--timeout", type=float, default=None, help="seconds allowed per maze")
+    parser.add_argument("--cache", default=None, help="sqlite file to keep solved paths in between runs")
+    parser.add_argument("--stats", action="store_true",
+                        help="print search counters and timers after every path (only without a worker pool)")
+    parser.add_argument("--verbose", action="store_true", help="log loading and solving progress")
+    return parser.parse_args(argv)
+
+def _print_stats(maze_number, stats):
+    """
+    Function that prints the counters and timers of one solved maze
+    """
+    timings = ", ".join("{} {:.6f}s".format(name, seconds) for name, seconds in stats.timings.items())
+    print("Maze #{} stats: {} states expanded, {} enqueued, {} pruned as visited, {} pruned for lives, "
+          "queue peak {}, {}".format(maze_number, stats.expanded, stats.enqueued, stats.pruned_visited,
+                                     stats.pruned_lives, stats.queue_peak, timings))
+
+def main(argv=None):
     """
     Main function to run the maze_solver.py
     """
-    file_path = "mazes.txt"
-    mazes = make_mazes(file_path)
-    shortest_paths = []
-    for idx, maze in enumerate(mazes):
-        print("Trying to solve maze #{}:\n".format(idx + 1))
-        shortest_paths.append(find_shortest_path(maze))   
-    print("Output Answer:\n{}".format(shortest_paths))
+    args = _parse_args(argv)
+    if args.verbose:
+        logging.basicConfig(level=logging.DEBUG, format="%(message)s")
+    if args.workers == 1:
+        results = solve_stream(args.file_path, args.timeout, args.cache, _print_stats if args.stats else None)
+    else:
+        results = solve_batch(args.file_path, args.workers or None, args.chunk_size, args.timeout, args.cache)
+    print("Output Answer:")
+    for idx, shortest_path in enumerate(results):
+        if isinstance(shortest_path, Exception):
+            print("There was an error with maze #{}: {}".format(idx + 1, shortest_path))
+        else:
+            print(shortest_path)
 
 if __name__ == '__main__':
     main()
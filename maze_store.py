@@ -0,0 +1,171 @@
+import argparse
+import mmap
+import struct
+
+from maze_solver import Maze, find_shortest_path, iter_mazes, _map_chunks_in_order
+
+# A maze store is a header, the mazes back to back, then an index of their offsets:
+#   header  magic, version, reserved, maze count, index offset
+#   maze    height, width, start index, end index, then height * width room values as uint8
+#   index   one uint64 offset per maze
+MAGIC = b"MAZEPACK"
+VERSION = 1
+_HEADER = struct.Struct("<8sHHIQ")
+_RECORD = struct.Struct("<IIII")
+_OFFSET = struct.Struct("<Q")
+
+def convert_maze_file(maze_file_path, store_path):
+    """
+    Function that converts a text maze file into a binary maze store.
+    Lines that cannot be parsed are left out.
+    Returns the number of mazes written and the number of lines skipped.
+    """
+    if not isinstance(maze_file_path, str):
+        raise Exception("maze_file_path is not a string!")
+    if not isinstance(store_path, str):
+        raise Exception("store_path is not a string!")
+    offsets = []
+    skipped = 0
+    with open(store_path, "wb") as f:
+        f.write(_HEADER.pack(MAGIC, VERSION, 0, 0, 0))
+        for maze in iter_mazes(maze_file_path):
+            if isinstance(maze, Exception):
+                skipped += 1
+                continue
+            offsets.append(f.tell())
+            f.write(_RECORD.pack(maze.height, maze.width, maze.start, maze.end))
+            f.write(maze.rooms)
+        index_offset = f.tell()
+        for offset in offsets:
+            f.write(_OFFSET.pack(offset))
+        f.seek(0)
+        f.write(_HEADER.pack(MAGIC, VERSION, 0, len(offsets), index_offset))
+    return len(offsets), skipped
+
+class MazeStore(object):
+    """
+    Class that memory maps a binary maze store and hands out mazes by their position in it.
+    The rooms of every Maze it returns are a zero-copy memoryview into the mapped file,
+    so opening a store and reading maze N never touches the rest of the file.
+    Closing the store always closes its file, but while mazes taken from it are still alive
+    the mapping is left in place for them and goes away with the last of them.
+    """
+    __slots__ = ("_file", "_mmap", "_view", "_count", "_index_offset")
+
+    def __init__(self, store_path):
+        if not isinstance(store_path, str):
+            raise Exception("store_path is not a string!")
+        self._file = open(store_path, "rb")
+        try:
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise Exception("store_path is not a maze store!")
+        if len(self._mmap) < _HEADER.size:
+            self.close()
+            raise Exception("store_path is not a maze store!")
+        magic, version, _, self._count, self._index_offset = _HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise Exception("store_path is not a maze store!")
+        self._view = memoryview(self._mmap)
+
+    def __len__(self):
+        return self._count
+
+    def __getitem__(self, n):
+        if not isinstance(n, int) or isinstance(n, bool):
+            raise TypeError("maze index is not an int!")
+        if n < 0:
+            n += self._count
+        if not 0 <= n < self._count:
+            raise IndexError("maze index out of range!")
+        offset, = _OFFSET.unpack_from(self._mmap, self._index_offset + n * _OFFSET.size)
+        height, width, start, end = _RECORD.unpack_from(self._mmap, offset)
+        rooms_offset = offset + _RECORD.size
+        return Maze.from_buffer(height, width, self._view[rooms_offset:rooms_offset + height * width], start, end)
+
+    def __iter__(self):
+        for n in range(self._count):
+            yield self[n]
+
+    def close(self):
+        """
+        Method that closes the file of the store and unmaps it, unless mazes taken from it still use the mapping
+        """
+        try:
+            view = getattr(self, "_view", None)
+            mapped = getattr(self, "_mmap", None)
+            self._view = None
+            self._mmap = None
+            if view is not None:
+                view.release()
+            if mapped is not None:
+                mapped.close()
+        except BufferError:
+            pass
+        finally:
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+def _solve_store_range(store_path, first, last, timeout=None):
+    """
+    Function run by the batch workers: maps the store and solves mazes first up to last.
+    Returns one shortest path per maze, or the exception raised while solving it.
+    """
+    results = []
+    with MazeStore(store_path) as store:
+        for n in range(first, last):
+            try:
+                results.append(find_shortest_path(store[n], timeout=timeout))
+            except Exception as e:
+                results.append(e)
+    return results
+
+def solve_store(store_path, workers=None, chunk_size=64, timeout=None):
+    """
+    Generator which solves every maze of a maze store across a pool of worker processes.
+    Workers map the store themselves and are only sent ranges of maze positions.
+    Shortest paths are yielded in store order as soon as they are ready.
+    """
+    if not isinstance(chunk_size, int) or chunk_size < 1:
+        raise Exception("chunk_size is not a positive int!")
+    with MazeStore(store_path) as store:
+        count = len(store)
+    tasks = ((store_path, first, min(first + chunk_size, count), timeout) for first in range(0, count, chunk_size))
+    yield from _map_chunks_in_order(_solve_store_range, tasks, workers)
+
+def main(argv=None):
+    """
+    Main function to run the maze_store.py
+    """
+    parser = argparse.ArgumentParser(description="Convert maze files into binary maze stores and solve them.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    convert = commands.add_parser("convert", help="convert a text maze file into a maze store")
+    convert.add_argument("file_path", help="maze file with one maze per line")
+    convert.add_argument("store_path", help="maze store to write")
+    solve = commands.add_parser("solve", help="solve every maze of a maze store")
+    solve.add_argument("store_path", help="maze store to solve")
+    solve.add_argument("--workers", type=int, default=0, help="worker processes to solve with, 0 uses every CPU")
+    solve.add_argument("--chunk-size", type=int, default=64, help="mazes sent to a worker at a time")
+    solve.add_argument("--timeout", type=float, default=None, help="seconds allowed per maze")
+    args = parser.parse_args(argv)
+    if args.command == "convert":
+        written, skipped = convert_maze_file(args.file_path, args.store_path)
+        print("Wrote {} mazes to {}, skipped {} lines".format(written, args.store_path, skipped))
+        return
+    print("Output Answer:")
+    for idx, shortest_path in enumerate(solve_store(args.store_path, args.workers or None, args.chunk_size,
+                                                    args.timeout)):
+        if isinstance(shortest_path, Exception):
+            print("There was an error with maze #{}: {}".format(idx + 1, shortest_path))
+        else:
+            print(shortest_path)
+
+if __name__ == '__main__':
+    main()
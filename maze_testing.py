@@ -0,0 +1,17 @@
+def random_maze_string(rng, height, width, door_chance=0.8, mine_chance=0.2, max_ends=3):
+    """
+    Function used by the tests to build a maze string with random one sided doors inside the grid, random mines,
+    one start room and between one and max_ends end rooms, drawing every choice from rng
+    """
+    room_values = []
+    for i in range(height):
+        for j in range(width):
+            room_value = 64 if rng.random() < mine_chance else 0
+            for bit, allowed in ((1, i > 0), (4, i < height - 1), (8, j > 0), (2, j < width - 1)):
+                if allowed and rng.random() < door_chance:
+                    room_value |= bit
+            room_values.append(room_value)
+    room_values[rng.randrange(height * width)] |= 16
+    for _ in range(rng.randint(1, max_ends) if max_ends > 1 else 1):
+        room_values[rng.randrange(height * width)] |= 32
+    return "({},{})-[{}]".format(height, width, ",".join(map(str, room_values)))
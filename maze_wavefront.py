@@ -0,0 +1,109 @@
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from maze_solver import DOWN, END, LEFT, MINE, RIGHT, UP, _check_deadline, _hooks
+
+# Moves in the order they are tried: direction, door bit of the room left, row step and column step
+_MOVES = (("up", UP, -1, 0), ("down", DOWN, 1, 0), ("left", LEFT, 0, -1), ("right", RIGHT, 0, 1))
+
+def search_wavefront(maze, lives, deadline=None, stats=None):
+    """
+    Function that runs a breadth first search a whole layer at a time with NumPy arrays.
+    The room values are decoded once into door, mine and end masks, and each lives level is its own layer
+    of states, numbered lives remaining * rooms + room, so a mined room sends a state one layer down.
+    A frontier is an array of such states and is grown by one masked gather per direction,
+    keeping the work per layer in line with the frontier instead of the whole grid.
+    The move each state was first reached by is kept and the path is backtracked through it.
+    Counters are kept per layer, and hooks, which need a Python call per state, are only walked when set.
+    Returns the path, or None if the end cannot be reached, and the lives remaining at the end.
+    """
+    if np is None:
+        raise Exception("strategy wavefront needs numpy!")
+    width = maze.width
+    room_count = maze.height * width
+    rooms = np.frombuffer(maze.rooms, dtype=np.uint8)
+    doors = [(rooms & bit) != 0 for _, bit, _, _ in _MOVES]
+    mines = ((rooms & MINE) != 0).astype(np.int64)
+    ends = (rooms & END) != 0
+    columns = np.arange(room_count) % width
+    in_bounds = [
+        np.arange(room_count) >= width,
+        np.arange(room_count) < room_count - width,
+        columns > 0,
+        columns < width - 1
+    ]
+    moves_allowed = [doors[move] & in_bounds[move] for move in range(len(_MOVES))]
+    start = maze.start
+    start_lives = lives - int(mines[start])
+    if start_lives <= 0:
+        return None, 0
+    if ends[start]:
+        return [], start_lives
+    on_expand, on_enqueue, on_goal = _hooks(maze, stats)
+
+    start_state = start_lives * room_count + start
+    visited = np.zeros((lives + 1) * room_count, dtype=bool)
+    moves = np.full((lives + 1) * room_count, -1, dtype=np.int8)
+    visited[start_state] = True
+    frontier = np.array([start_state], dtype=np.int64)
+    expanded = enqueued = pruned_visited = pruned_lives = 0
+    queue_peak = 1
+    path = None
+    while frontier.size:
+        _check_deadline(deadline)
+        expanded += frontier.size
+        frontier_rooms = frontier % room_count
+        frontier_lives = frontier // room_count
+        if on_expand is not None:
+            for room, room_lives in zip(frontier_rooms.tolist(), frontier_lives.tolist()):
+                on_expand(room, room_lives)
+        reached = []
+        for move, (_, _, row_step, column_step) in enumerate(_MOVES):
+            leaving = moves_allowed[move][frontier_rooms]
+            next_rooms = frontier_rooms[leaving] + row_step * width + column_step
+            next_lives = frontier_lives[leaving] - mines[next_rooms]
+            alive = next_lives > 0
+            pruned_lives += next_lives.size - int(alive.sum())
+            next_states = next_lives[alive] * room_count + next_rooms[alive]
+            unseen = ~visited[next_states]
+            pruned_visited += next_states.size - int(unseen.sum())
+            next_states = np.unique(next_states[unseen])
+            visited[next_states] = True
+            moves[next_states] = move
+            reached.append(next_states)
+        reached = np.concatenate(reached)
+        at_end = ends[reached % room_count]
+        if at_end.any():
+            goal_state = int(reached[at_end][0])
+            if on_goal is not None:
+                on_goal(goal_state % room_count, goal_state // room_count)
+            path = _backtrack(moves, mines, goal_state, start_state, room_count, width)
+            break
+        frontier = reached
+        enqueued += frontier.size
+        queue_peak = max(queue_peak, frontier.size)
+        if on_enqueue is not None:
+            for state in frontier.tolist():
+                on_enqueue(state % room_count, state // room_count)
+    if stats is not None:
+        stats._record(expanded, enqueued, pruned_visited, pruned_lives, queue_peak)
+    if path is None:
+        return None, 0
+    return path, goal_state // room_count
+
+def _backtrack(moves, mines, state, start_state, room_count, width):
+    """
+    Function that follows the stored moves back from a goal state to the start state and returns the directions taken
+    """
+    path = []
+    while state != start_state:
+        direction, _, row_step, column_step = _MOVES[moves[state]]
+        path.append(direction)
+        room_lives, room = divmod(state, room_count)
+        room_lives += int(mines[room])
+        room -= row_step * width + column_step
+        state = room_lives * room_count + room
+    path.reverse()
+    return path
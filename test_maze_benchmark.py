@@ -0,0 +1,51 @@
+import json
+import pytest
+from maze_benchmark import benchmark_edits, benchmark_parse, benchmark_strategies, benchmark_suite, write_report, \
+    _parse_maze_string_eval
+from maze_generator import generate_maze_string
+from maze_solver import available_strategies, parse_maze_string
+
+class TestBenchmarkParse(object):
+
+    @pytest.mark.parametrize("function_args", [(3), (20)])
+    def test_eval_baseline_matches_tokenizer(self, function_args):
+        maze_string = generate_maze_string(function_args, function_args, seed=function_args)
+        assert _parse_maze_string_eval(maze_string).rooms == parse_maze_string(maze_string).rooms
+
+    def test_benchmark_parse_reports_every_size(self):
+        results = benchmark_parse([3, 5], repeat=1)
+        assert [result["rooms"] for result in results] == [9, 25]
+        assert all(result["tokenizer_seconds"] > 0 for result in results)
+
+class TestBenchmarkStrategies(object):
+
+    def test_benchmark_strategies_compares_every_engine(self):
+        results = benchmark_strategies("test_mazes.txt", repeat=1)
+        strategies = available_strategies()
+        assert [result["strategy"] for result in results[:len(strategies)]] == strategies
+        assert [result["path_length"] for result in results] == [3] * 2 * len(strategies) + [5] * len(strategies)
+        assert all(result["expanded"] > 0 for result in results)
+
+class TestBenchmarkSuite(object):
+
+    def test_benchmark_suite_writes_json_report(self, tmp_path):
+        results = benchmark_suite([5, 12], seed=1, mine_density=0)
+        assert [result["rooms"] for result in results] == [25, 144]
+        assert all(result["expanded"] > 0 and result["end_to_end_peak_bytes"] > 0 for result in results)
+        report_path = str(tmp_path / "report.json")
+        write_report(results, report_path)
+        with open(report_path) as f:
+            assert json.load(f)["results"] == results
+
+    def test_benchmark_suite_can_skip_memory(self):
+        results = benchmark_suite([5], trace_memory=False)
+        assert results[0]["parse_peak_bytes"] is None
+
+class TestBenchmarkEdits(object):
+
+    @pytest.mark.parametrize("seed", range(3))
+    def test_benchmark_edits_matches_fresh_solves(self, seed):
+        result = benchmark_edits(size=12, edits=30, seed=seed, mine_density=0.1)
+        assert result["rooms"] == 144 and result["edits"] == 30
+        assert result["mismatches"] == 0
+        assert result["incremental_seconds"] > 0 and result["fresh_seconds"] > 0
@@ -0,0 +1,92 @@
+import pytest
+import maze_solver
+from maze_cache import SolutionCache, maze_key
+from maze_solver import find_shortest_path, main, parse_maze_string
+
+MAZE_STRING = "(3,3)-[34,14,12,6,77,5,1,19,9]"
+
+class TestMazeKey(object):
+
+    def test_maze_key_is_content_addressed(self):
+        maze = parse_maze_string(MAZE_STRING)
+        assert maze_key(maze) == maze_key(maze.to_dict())
+        assert maze_key(maze) != maze_key(maze, lives=1)
+        assert maze_key(maze) != maze_key(parse_maze_string("(3,3)-[34,14,12,6,77,5,1,19,1]"))
+
+    @pytest.mark.parametrize("function_args", [(None), ([]), ("")])
+    def test_maze_key_parameters_are_invalid(self, function_args):
+        with pytest.raises(Exception, match=r"maze is not a dict!"):
+            maze_key(function_args)
+
+class TestSolutionCache(object):
+
+    @pytest.mark.parametrize("function_args", [(-1), (1.0), (None), (True)])
+    def test_solution_cache_parameters_are_invalid(self, function_args):
+        with pytest.raises(Exception, match=r"max_entries is not a non negative int!"):
+            SolutionCache(max_entries=function_args)
+
+    def test_solution_cache_counts_hits_and_misses(self):
+        cache = SolutionCache(max_entries=1)
+        maze = parse_maze_string(MAZE_STRING)
+        assert cache.solve(maze) == ['up', 'up', 'left']
+        assert cache.solve(parse_maze_string(MAZE_STRING)) == ['up', 'up', 'left']
+        assert cache.solve(maze, lives=1) == ['right', 'up', 'up', 'left', 'left']
+        assert cache.solve(maze) == ['up', 'up', 'left']
+        assert cache.stats() == {"hits": 1, "disk_hits": 0, "misses": 3, "evictions": 2, "entries": 1}
+
+    def test_solution_cache_respects_lives(self):
+        cache = SolutionCache()
+        maze = parse_maze_string("(3,3)-[34,14,12,6,77,5,1,18,9]")
+        assert cache.solve(maze, lives=2) == find_shortest_path(maze, lives=2)
+        assert cache.solve(maze, lives=1) == find_shortest_path(maze, lives=1)
+        assert cache.stats()["misses"] == 2
+
+    def test_solution_cache_persists_between_runs(self, tmp_path):
+        store_path = str(tmp_path / "solutions.sqlite")
+        with SolutionCache(store_path=store_path) as cache:
+            cache.solve(parse_maze_string(MAZE_STRING))
+        with SolutionCache(store_path=store_path) as cache:
+            assert cache.solve(parse_maze_string(MAZE_STRING)) == ['up', 'up', 'left']
+            assert cache.stats()["disk_hits"] == 1
+            assert cache.stats()["misses"] == 0
+
+    def test_solution_caches_share_one_file(self, tmp_path):
+        store_path = str(tmp_path / "solutions.sqlite")
+        with SolutionCache(store_path=store_path) as first_cache, SolutionCache(store_path=store_path) as second_cache:
+            assert first_cache.solve(parse_maze_string(MAZE_STRING)) == ['up', 'up', 'left']
+            assert second_cache.solve(parse_maze_string(MAZE_STRING), lives=1) == ['right', 'up', 'up', 'left', 'left']
+            assert first_cache.stats()["misses"] == second_cache.stats()["misses"] == 1
+        with SolutionCache(store_path=store_path) as cache:
+            cache.solve(parse_maze_string(MAZE_STRING))
+            cache.solve(parse_maze_string(MAZE_STRING), lives=1)
+            assert cache.stats()["disk_hits"] == 2
+
+    def test_solution_cache_still_solves_when_the_file_fails(self, caplog, tmp_path):
+        store_path = str(tmp_path / "solutions.sqlite")
+        with SolutionCache(store_path=store_path) as cache:
+            cache._db.execute("DROP TABLE solutions")
+            assert cache.solve(parse_maze_string(MAZE_STRING)) == ['up', 'up', 'left']
+            assert cache.stats()["misses"] == 1
+        assert "Could not save a solved path to the solution cache" in caplog.text
+
+    def test_batch_worker_keeps_its_cache_between_chunks(self, monkeypatch, tmp_path):
+        monkeypatch.setattr(maze_solver, "_worker_cache", None)
+        maze_solver._open_worker_cache(str(tmp_path / "solutions.sqlite"))
+        maze_line = MAZE_STRING.encode("ascii")
+        assert maze_solver._solve_maze_lines([maze_line]) == [['up', 'up', 'left']]
+        assert maze_solver._solve_maze_lines([maze_line]) == [['up', 'up', 'left']]
+        assert maze_solver._worker_cache.stats()["hits"] == 1
+        assert maze_solver._worker_cache.stats()["disk_hits"] == 0
+        maze_solver._worker_cache.close()
+
+    @pytest.mark.parametrize("function_args", [(["--workers", "1"]), (["--workers", "2"])])
+    def test_main_uses_cache(self, capsys, tmp_path, function_args):
+        store_path = str(tmp_path / "solutions.sqlite")
+        main(["test_mazes.txt", "--cache", store_path] + function_args)
+        first_run = capsys.readouterr().out
+        main(["test_mazes.txt", "--cache", store_path] + function_args)
+        assert capsys.readouterr().out == first_run
+        with SolutionCache(store_path=store_path) as cache:
+            for maze_string in open("test_mazes.txt"):
+                cache.solve(parse_maze_string(maze_string))
+            assert cache.stats()["disk_hits"] == 3
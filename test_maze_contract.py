@@ -0,0 +1,73 @@
+import random
+import pytest
+from maze_contract import ContractedMaze, contract_maze
+from maze_solver import find_shortest_path, make_mazes, parse_maze_string, available_strategies, SolverStats
+from maze_testing import random_maze_string
+
+class TestContractedMaze(object):
+
+    def test_corridors_become_edges(self):
+        graph = ContractedMaze(parse_maze_string("(1,5)-[18,10,74,10,40]"))
+        assert graph.nodes == [0, 4]
+        assert graph.out_edges == [[(1, 4, 1, 1)], [(0, 4, 1, 3)]]
+        assert graph.in_edges == [[(1, 4, 1)], [(0, 4, 1)]]
+        assert (graph.start_node, graph.end_nodes) == (0, [1])
+
+    def test_one_way_rooms_are_not_corridors(self):
+        graph = ContractedMaze(parse_maze_string("(2,3)-[18,10,40,0,1,0]"))
+        assert graph.nodes == [0, 1, 2]
+        assert graph.out_edges == [[(1, 1, 0, 1)], [(0, 1, 0, 0), (2, 1, 0, 2)], [(1, 1, 0, 1)]]
+
+    def test_dead_ends_are_pruned(self):
+        graph = ContractedMaze(parse_maze_string("(3,3)-[18,14,40,0,5,0,0,1,0]"))
+        assert graph.nodes == [0, 1, 2]
+        assert graph.edge_count == 4
+        assert graph.node_of[7] == -1 and graph.node_of[4] == -1
+
+    def test_edges_walk_back_to_directions(self):
+        maze = parse_maze_string("(2,3)-[22,10,12,3,10,41]")
+        graph = ContractedMaze(maze)
+        assert graph.edge_directions(maze.rooms, graph.start_node, graph.out_edges[graph.start_node][0]) == \
+            ["down", "right", "right"]
+
+    def test_contracted_mazes_are_cached_by_content(self):
+        maze = parse_maze_string("(1,5)-[18,10,74,10,40]")
+        graph = contract_maze(maze)
+        assert contract_maze(parse_maze_string("(1,5)-[18,10,74,10,40]")) is graph
+        maze.update_room((1, 3), 10)
+        assert contract_maze(maze) is not graph
+
+class TestSearchContracted(object):
+
+    def test_contracted_is_a_strategy(self):
+        assert "contracted" in available_strategies()
+
+    def test_contracted_matches_bfs_on_mazes(self):
+        for maze in make_mazes("mazes.txt") + make_mazes("test_mazes.txt"):
+            assert find_shortest_path(maze, strategy="contracted") == find_shortest_path(maze)
+
+    @pytest.mark.parametrize("seed", range(5))
+    def test_contracted_matches_bfs_on_random_mazes(self, seed):
+        rng = random.Random(seed)
+        for _ in range(40):
+            maze = parse_maze_string(random_maze_string(rng, rng.randint(1, 8), rng.randint(1, 8)))
+            lives = rng.randint(1, 4)
+            assert find_shortest_path(maze, lives=lives, strategy="contracted") == find_shortest_path(maze, lives=lives)
+
+    def test_contracted_expands_fewer_states(self):
+        maze = make_mazes("mazes.txt")[2]
+        stats = SolverStats()
+        bfs_stats = SolverStats()
+        find_shortest_path(maze, strategy="contracted", stats=stats)
+        find_shortest_path(maze, stats=bfs_stats)
+        assert 0 < stats.expanded < bfs_stats.expanded
+        assert set(stats.timings) == {"contract", "search"}
+
+    @pytest.mark.parametrize("maze_string, lives, expected_result", [
+        ("(1,3)-[18,74,40]", 1, ["N/A"]),
+        ("(1,3)-[18,74,40]", 2, ["right", "right"]),
+        ("(1,2)-[50,40]", 3, ["N/A"]),
+        ("(1,2)-[82,40]", 1, ["N/A"])
+    ])
+    def test_contracted_lives(self, maze_string, lives, expected_result):
+        assert find_shortest_path(parse_maze_string(maze_string), lives=lives, strategy="contracted") == expected_result
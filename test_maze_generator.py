@@ -0,0 +1,44 @@
+import pytest
+from maze_generator import generate_maze_string, generate_rooms, write_maze_file
+from maze_solver import find_shortest_path, make_mazes, parse_maze_string
+
+class TestGenerateRooms(object):
+
+    @pytest.mark.parametrize("function_args, error_message", [
+        ((0, 5), r"height is not a positive int!"),
+        ((5, 1.5), r"width is not a positive int!"),
+        ((5, 5, 0, 1.5), r"loop_density is not in range!"),
+        ((5, 5, 0, 0.1, -0.1), r"mine_density is not in range!")
+    ])
+    def test_generate_rooms_parameters_are_invalid(self, function_args, error_message):
+        with pytest.raises(Exception, match=error_message):
+            generate_rooms(*function_args)
+
+    @pytest.mark.parametrize("function_args", [(1, 1), (1, 7), (9, 1), (12, 17)])
+    def test_generate_rooms_opens_doors_both_ways(self, function_args):
+        height, width = function_args
+        rooms = generate_rooms(height, width, seed=3, loop_density=0.3, mine_density=0.2)
+        for room, room_value in enumerate(rooms):
+            row, column = divmod(room, width)
+            assert bool(room_value & 1) == (row > 0 and bool(rooms[room - width] & 4))
+            assert bool(room_value & 8) == (column > 0 and bool(rooms[room - 1] & 2))
+            assert not (row == height - 1 and room_value & 4)
+            assert not (column == width - 1 and room_value & 2)
+        assert sum(1 for room_value in rooms if room_value & 16) == 1
+        assert sum(1 for room_value in rooms if room_value & 32) == 1
+
+    def test_generate_maze_string_is_seeded(self):
+        assert generate_maze_string(20, 30, seed=5) == generate_maze_string(20, 30, seed=5)
+        assert generate_maze_string(20, 30, seed=5) != generate_maze_string(20, 30, seed=6)
+
+    @pytest.mark.parametrize("seed", range(5))
+    def test_generated_maze_without_mines_is_solvable(self, seed):
+        maze = parse_maze_string(generate_maze_string(15, 25, seed=seed, mine_density=0))
+        assert find_shortest_path(maze) != ["N/A"]
+
+    def test_write_maze_file(self, tmp_path):
+        maze_file = str(tmp_path / "mazes.txt")
+        write_maze_file(maze_file, 3, 4, 6, seed=10)
+        mazes = make_mazes(maze_file)
+        assert len(mazes) == 3
+        assert mazes[2] == parse_maze_string(generate_maze_string(4, 6, seed=12))
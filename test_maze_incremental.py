@@ -0,0 +1,74 @@
+import random
+import pytest
+from maze_incremental import IncrementalSolver
+from maze_solver import find_shortest_path, parse_maze_string, Maze, SolverStats
+from maze_testing import random_maze_string
+
+def _fresh_path(maze, lives):
+    """
+    Function that solves a copy of a maze from scratch
+    """
+    return find_shortest_path(Maze(maze.height, maze.width, bytearray(maze.rooms)), lives=lives)
+
+class TestIncrementalSolver(object):
+
+    @pytest.mark.parametrize("seed", range(8))
+    def test_edits_give_the_same_path_as_a_fresh_solve(self, seed):
+        rng = random.Random(seed)
+        for _ in range(5):
+            maze = parse_maze_string(random_maze_string(rng, rng.randint(1, 8), rng.randint(1, 8), door_chance=0.7))
+            lives = rng.randint(1, 4)
+            solver = IncrementalSolver(maze, lives)
+            for _ in range(30):
+                assert solver.shortest_path() == _fresh_path(maze, lives)
+                room = rng.randrange(maze.height * maze.width)
+                room_value = maze.rooms[room] ^ rng.choice([1, 2, 4, 8, 1, 2, 4, 8, 32, 64, 64, 16])
+                try:
+                    solver.update_room(maze.room_id(room), room_value)
+                except Exception:
+                    pass
+
+    def test_repair_expands_fewer_states_than_the_first_solve(self):
+        maze = parse_maze_string("(1,6)-[18,10,10,10,10,40]")
+        solver = IncrementalSolver(maze)
+        first_stats = SolverStats()
+        assert solver.shortest_path(first_stats) == ["right"] * 5
+        solver.update_room((1, 3), 74)
+        repair_stats = SolverStats()
+        assert solver.shortest_path(repair_stats) == ["right"] * 5
+        assert 0 < repair_stats.expanded < first_stats.expanded
+        solver.update_room((1, 4), 72)
+        assert solver.shortest_path() == ["N/A"]
+        solver.update_room((1, 4), 74)
+        assert solver.shortest_path() == ["right"] * 5
+        solver.update_room((1, 5), 74)
+        assert solver.shortest_path() == _fresh_path(maze, 3) == ["N/A"]
+        solver.update_room((1, 4), 10)
+        assert solver.shortest_path() == ["right"] * 5
+
+    def test_moving_the_start_or_changing_the_maze_directly_starts_over(self):
+        maze = parse_maze_string("(3,3)-[34,14,12,6,77,5,1,19,9]")
+        solver = IncrementalSolver(maze)
+        assert solver.shortest_path() == ['up', 'up', 'left']
+        solver.update_room((3, 3), 9 | 16)
+        solver.update_room((3, 2), 3)
+        assert maze["start"] == (3, 3)
+        assert solver.shortest_path() == _fresh_path(maze, 3) == ['up', 'up', 'left', 'left']
+        maze.update_room((2, 2), 13)
+        assert solver.shortest_path() == _fresh_path(maze, 3)
+
+    @pytest.mark.parametrize("maze_string, lives", [
+        ("(1,2)-[50,40]", 3),
+        ("(1,2)-[82,40]", 1),
+        ("(1,2)-[16,32]", 3)
+    ])
+    def test_no_path(self, maze_string, lives):
+        assert IncrementalSolver(parse_maze_string(maze_string), lives).shortest_path() == ["N/A"]
+
+    @pytest.mark.parametrize("function_args, error_message", [
+        (("maze",), r"maze is not a dict!"),
+        ((parse_maze_string("(1,2)-[18,40]"), 0), r"lives is not a positive int!")
+    ])
+    def test_incremental_solver_parameters_are_invalid(self, function_args, error_message):
+        with pytest.raises(Exception, match=error_message):
+            IncrementalSolver(*function_args)
@@ -0,0 +1,46 @@
+import pytest
+from maze_index import MazeIndex
+from maze_solver import Maze, find_shortest_path, make_mazes, parse_maze_string
+
+MAZE_STRING = "(3,3)-[34,14,12,6,77,5,1,19,9]"
+
+class TestMazeIndex(object):
+
+    @pytest.mark.parametrize("function_args, error_message", [
+        ((None, 3), r"maze is not a dict!"),
+        (("", 3), r"maze is not a dict!"),
+        ((MAZE_STRING, 0), r"max_lives is not a positive int!"),
+        ((MAZE_STRING, True), r"max_lives is not a positive int!")
+    ])
+    def test_maze_index_parameters_are_invalid(self, function_args, error_message):
+        maze, max_lives = function_args
+        if maze == MAZE_STRING:
+            maze = parse_maze_string(maze)
+        with pytest.raises(Exception, match=error_message):
+            MazeIndex(maze, max_lives)
+
+    @pytest.mark.parametrize("function_args, error_message", [
+        ((0), r"lives is not a positive int!"),
+        ((4), r"lives is above the max_lives of the index!")
+    ])
+    def test_maze_index_queries_are_invalid(self, function_args, error_message):
+        with pytest.raises(Exception, match=error_message):
+            MazeIndex(parse_maze_string(MAZE_STRING)).shortest_path(lives=function_args)
+
+    def test_maze_index_answers_queries(self):
+        index = MazeIndex(parse_maze_string(MAZE_STRING))
+        assert index.shortest_path() == ['up', 'up', 'left']
+        assert index.shortest_paths([((3, 2), 1), ((3, 3), 3), ((1, 1), 3)]) == [
+            ['right', 'up', 'up', 'left', 'left'], ['up', 'up', 'left', 'left'], ['N/A']]
+        assert index.distances([((3, 2), 3), ((3, 2), 1), ((3, 1), 3), ((1, 1), 1)]) == [3, 5, 4, 0]
+        assert index.is_reachable((2, 2), 2)
+        assert not index.is_reachable((2, 2), 1)
+        assert index.nbytes == 9 * 3 * 4
+
+    def test_maze_index_matches_find_shortest_path(self):
+        for maze in make_mazes("mazes.txt"):
+            index = MazeIndex(maze, max_lives=4)
+            for room in range(0, maze.height * maze.width, 7):
+                for lives in (1, 2, 3, 4):
+                    from_room = Maze(maze.height, maze.width, maze.rooms, start=room)
+                    assert index.shortest_path(maze.room_id(room), lives) == find_shortest_path(from_room, lives=lives)
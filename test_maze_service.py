@@ -0,0 +1,125 @@
+import asyncio
+import os
+import signal
+import pytest
+from maze_generator import generate_maze_string
+from maze_service import MazeService, request_paths, _read_request
+
+MAZE_LINES = [maze_line for maze_line in open("mazes.txt").read().split("\n") if maze_line.strip()]
+
+def _serve(function, **options):
+    """
+    Function that starts a maze service on a free local port, runs function(service) against it and stops it again
+    """
+    async def run():
+        async with MazeService(workers=1, **options) as service:
+            return await function(service)
+    return asyncio.run(run())
+
+class TestReadRequest(object):
+
+    @pytest.mark.parametrize("line, expected_result", [
+        (b"(3,3)-[34,14,12,6,77,5,1,19,9]\n", (None, b"(3,3)-[34,14,12,6,77,5,1,19,9]\n", 3, None)),
+        (b'{"id": 7, "maze": "(1,1)-[48]", "lives": 2, "timeout": 0.5}', (7, b"(1,1)-[48]", 2, 0.5))
+    ])
+    def test_read_request(self, line, expected_result):
+        assert _read_request(line) == expected_result
+
+    @pytest.mark.parametrize("line, error_message", [
+        (b"{maze", "request is not valid JSON!"),
+        (b'{"id": 7}', "request has no maze string!"),
+        (b'{"maze": "(1,1)-[48]", "lives": 0}', "lives is not a positive int!"),
+        (b'{"maze": "(1,1)-[48]", "timeout": -1}', "timeout is not a positive number!")
+    ])
+    def test_read_request_errors(self, line, error_message):
+        with pytest.raises(Exception) as e:
+            _read_request(line)
+        assert str(e.value) == error_message
+
+class TestMazeService(object):
+
+    def test_service_answers_in_request_order(self):
+        async def client(service):
+            return await request_paths(service.host, service.port, MAZE_LINES + [
+                {"id": "a", "maze": "(3,3)-[34,14,12,6,77,5,1,19,9]", "lives": 1},
+                {"id": "b", "maze": "(3,3)-[34,14]"},
+                "not a maze"
+            ])
+        responses = _serve(client)
+        assert [len(response["path"]) for response in responses[:3]] == [28, 59, 123]
+        assert responses[3] == {"id": "a", "status": "ok", "path": ["right", "up", "up", "left", "left"]}
+        assert responses[4]["id"] == "b" and responses[4]["status"] == "error"
+        assert responses[4]["error"].startswith("maze_string is not valid!")
+        assert responses[5] == {"status": "error", "error": "maze_string is not valid! expected '(' at offset 0"}
+
+    def test_service_handles_concurrent_clients(self):
+        async def clients(service):
+            return await asyncio.gather(*(request_paths(service.host, service.port, MAZE_LINES) for _ in range(8)))
+        for responses in _serve(clients, batch_size=4):
+            assert [len(response["path"]) for response in responses] == [28, 59, 123]
+
+    def test_service_rejects_requests_when_overloaded(self):
+        async def burst(service):
+            responses = await asyncio.gather(*(service.solve(MAZE_LINES[0]) for _ in range(10)))
+            return responses, service.served, service.rejected
+        responses, served, rejected = _serve(burst, max_pending=2)
+        assert [response["status"] for response in responses] == ["ok"] * 2 + ["overloaded"] * 8
+        assert responses[2]["error"] == "service is overloaded!"
+        assert (served, rejected) == (2, 8)
+
+    def test_service_times_out_slow_requests(self):
+        big_maze = generate_maze_string(500, 500, seed=1, mine_density=0)
+        async def client(service):
+            responses = await request_paths(service.host, service.port, [
+                {"maze": big_maze, "timeout": 0.01},
+                MAZE_LINES[0]
+            ])
+            return responses, service.timed_out
+        responses, timed_out = _serve(client)
+        assert responses[0] == {"status": "timeout", "error": "maze was not solved in time!"}
+        assert len(responses[1]["path"]) == 28
+        assert timed_out == 1
+
+    def test_service_rejects_requests_above_its_limits(self):
+        async def client(service):
+            return await request_paths(service.host, service.port, [
+                {"id": 1, "maze": "(1,2)-[18,40]", "lives": 1000000000},
+                {"id": 2, "maze": "(3,3)-[34,14,12,6,77,5,1,19,9]", "lives": 4},
+                {"id": 3, "maze": "(3,3)-[34,14,12,6,77,5,1,19,9]", "lives": 3}
+            ])
+        responses = _serve(client, max_lives=4, max_states=36)
+        assert responses[0] == {"id": 1, "status": "error", "error": "lives is above the limit of 4!"}
+        assert responses[1] == {"id": 2, "status": "error", "error": "maze is too big for its lives budget!"}
+        assert responses[2] == {"id": 3, "status": "ok", "path": ["up", "up", "left"]}
+
+    @pytest.mark.parametrize("options, error_message", [
+        ({"max_lives": 0}, "max_lives is not a positive int!"),
+        ({"max_states": 1.5}, "max_states is not a positive int!")
+    ])
+    def test_service_parameters_are_invalid(self, options, error_message):
+        with pytest.raises(Exception) as e:
+            MazeService(**options)
+        assert str(e.value) == error_message
+
+    def test_service_replaces_a_dead_worker(self, caplog):
+        big_maze = generate_maze_string(500, 500, seed=1, mine_density=0)
+        def kill_workers(service):
+            for pid in list(service._executor._processes):
+                os.kill(pid, signal.SIGKILL)
+        async def client(service):
+            kill_workers(service)
+            after_idle_kill = [await service.solve(MAZE_LINES[0]) for _ in range(2)]
+            solving = asyncio.ensure_future(service.solve(big_maze))
+            while service.batches < 3:
+                await asyncio.sleep(0.001)
+            kill_workers(service)
+            return after_idle_kill, await solving
+        after_idle_kill, after_busy_kill = _serve(client)
+        assert [len(response["path"]) for response in after_idle_kill] == [28, 28]
+        assert after_busy_kill["status"] == "ok"
+        assert caplog.text.count("A worker process died") == 2
+
+    def test_service_must_be_started(self):
+        with pytest.raises(Exception) as e:
+            asyncio.run(MazeService().solve(MAZE_LINES[0]))
+        assert str(e.value) == "service is not started!"
@@ -1,5 +1,9 @@
+import logging
 import pytest
-from maze_solver import find_shortest_path, make_mazes, parse_maze_string, decode_room
+import time
+from maze_solver import find_shortest_path, make_mazes, parse_maze_string, decode_room, Maze, \
+    MazeFormatError, parse_maze_bytes, iter_mazes, solve_stream, solve_batch, main, SolverStats
+import pickle
 
 class TestDecodeRoom(object):
 
@@ -47,13 +51,44 @@ class TestParseMazeString(object):
         ((False), r"maze_string is not a string!"),
         ((''), r"maze_string is not valid!"),
         (("(3,3)-[34,14,12,6,77,5,1,1,9]"), r"no start node was provided!"),
-        (("(3,3)-[30,14,12,6,77,5,1,19,9]"), r"no end node was provided!")
+        (("(3,3)-[30,14,12,6,77,5,1,19,9]"), r"no end node was provided!"),
+        (("(3,3)-[34,14,12,6,277,5,1,19,9]"), r"room value 277 is not in range at offset 18"),
+        (("(3,3)-[34,14,12,6,__import__('os'),5,1,19,9]"), r"unexpected character at offset 18")
     ])
     def test_parse_maze_string_parameters_are_invalid(self, function_args, error_message):
         with pytest.raises(Exception, match=error_message):
             maze_string = function_args
             parse_maze_string(maze_string)
     
+    @pytest.mark.parametrize("function_args, expected_offset", [
+        (("(3,3)-[34,14,12,6,77,5,1,19,9"), 29),
+        (("(3,3)-[34,14,12,6,77,5,1,19]"), 27),
+        (("(3,3)-[34,14,12,6,77,5,1,19,9,4]"), 30),
+        (("(3,3)-[34,14,12,6,,5,1,19,9]"), 18),
+        (("(3,3)-[34,14,12,6,77,5,1,19,9] x"), 31),
+        (("(3,a)-[34,14,12,6,77,5,1,19,9]"), 3),
+        (("(3," + "9" * 5000 + ")-[34,14,12,6,77,5,1,19,9]"), 3),
+        (("(3,3)-[34,14,12," + "9" * 5000 + ",77,5,1,19,9]"), 16),
+        (("(3,3)-[34,14,12,0000006,77,5,1,19," + "9" * 5000 + "]"), 34),
+        (("(" + "0" * 5000 + "1,1)-[48,48]"), 5010),
+        (("(1,1)-[48," + "0" * 5000 + "1]"), 10),
+        (("(1,1)-[" + "0" * 5000 + "200]"), 7)
+    ])
+    def test_parse_maze_string_reports_offset(self, function_args, expected_offset):
+        with pytest.raises(MazeFormatError) as error:
+            parse_maze_string(function_args)
+        assert error.value.offset == expected_offset
+
+    @pytest.mark.parametrize("function_args, expected_result", [
+        ((b" ( 3 , 3 ) - [ 34, 14,12,6,77,5,1,19,9 ]\n"), bytearray([34, 14, 12, 6, 77, 5, 1, 19, 9])),
+        ((b"(1,1)-[" + b"0" * 5000 + b"48]"), bytearray([48])),
+        ((b"(" + b"0" * 5000 + b"1,1)-[48]"), bytearray([48])),
+        ((b"(1,2)-[18," + b"0" * 5000 + b"40]"), bytearray([18, 40]))
+    ])
+    def test_parse_maze_bytes_parameters_are_valid(self, function_args, expected_result):
+        parsed_maze = parse_maze_bytes(function_args)
+        assert parsed_maze.rooms == expected_result
+
     @pytest.mark.parametrize("function_args, expected_result", [
         (("(3,3)-[34,14,12,6,77,5,1,19,9]"), {
             (1,1): {'up': False, 'right': True, 'down': False, 'left': False, 'start': False, 'end': True, 'mine': False},
@@ -192,4 +227,256 @@ class TestFindShortestPath(object):
     def test_find_shortest_path_parameters_are_valid(self, function_args, expected_result):
         maze = function_args
         shortest_path = find_shortest_path(maze)
-        assert shortest_path == expected_result
\ No newline at end of file
+        assert shortest_path == expected_result
+
+    @pytest.mark.parametrize("function_args, expected_result", [
+        (("mazes.txt"), [28, 59, 123])
+    ])
+    def test_find_shortest_path_large_mazes(self, function_args, expected_result):
+        mazes = make_mazes(function_args)
+        shortest_paths = [find_shortest_path(maze) for maze in mazes]
+        assert [len(path) for path in shortest_paths] == expected_result
+
+    @pytest.mark.parametrize("function_args, error_message", [
+        (({"lives": 0}), r"lives is not a positive int!"),
+        (({"lives": True}), r"lives is not a positive int!"),
+        (({"strategy": "dfs"}), r"strategy is not a known strategy!")
+    ])
+    def test_find_shortest_path_options_are_invalid(self, function_args, error_message):
+        with pytest.raises(Exception, match=error_message):
+            find_shortest_path(parse_maze_string("(3,3)-[34,14,12,6,77,5,1,19,9]"), **function_args)
+
+    @pytest.mark.parametrize("strategy", ["astar", "bidirectional"])
+    @pytest.mark.parametrize("maze_string, lives", [
+        ("(3,3)-[34,14,12,6,77,5,1,19,9]", 3),
+        ("(3,3)-[34,14,12,6,77,5,1,19,9]", 1),
+        ("(3,3)-[34,14,12,6,77,5,1,19,1]", 3),
+        ("(3,3)-[34,14,12,6,77,5,1,18,9]", 3),
+        ("(3,3)-[98,78,76,70,77,69,65,83,73]", 5),
+        ("(3,3)-[98,78,76,70,77,69,65,83,73]", 4)
+    ])
+    def test_find_shortest_path_strategies_match_bfs(self, strategy, maze_string, lives):
+        maze = parse_maze_string(maze_string)
+        expected_result = find_shortest_path(maze, lives=lives)
+        shortest_path = find_shortest_path(maze, lives=lives, strategy=strategy)
+        assert len(shortest_path) == len(expected_result)
+        assert (shortest_path == ["N/A"]) == (expected_result == ["N/A"])
+
+    @pytest.mark.parametrize("strategy", ["astar", "bidirectional"])
+    def test_find_shortest_path_strategies_on_large_mazes(self, strategy):
+        shortest_paths = [find_shortest_path(maze, strategy=strategy) for maze in make_mazes("mazes.txt")]
+        assert [len(path) for path in shortest_paths] == [28, 59, 123]
+
+class TestMaze(object):
+
+    @pytest.mark.parametrize("function_args, error_message", [
+        ((3, 3, bytearray([34, 14, 12, 6, 77, 5, 1, 19])), r"maze does not have 9 rooms!"),
+        ((3, 3, bytearray([34, 14, 12, 6, 77, 5, 1, 19, 128])), r"room_value is not in range!"),
+        ((3, 3, bytearray([34, 14, 12, 6, 77, 5, 1, 1, 9])), r"no start node was provided!"),
+        ((3, 3, bytearray([30, 14, 12, 6, 77, 5, 1, 19, 9])), r"no end node was provided!")
+    ])
+    def test_maze_parameters_are_invalid(self, function_args, error_message):
+        with pytest.raises(Exception, match=error_message):
+            Maze(*function_args)
+
+    def test_maze_packs_rooms(self):
+        maze = parse_maze_string("(3,3)-[34,14,12,6,77,5,1,19,9]")
+        assert (maze.height, maze.width) == (3, 3)
+        assert maze.rooms == bytearray([34, 14, 12, 6, 77, 5, 1, 19, 9])
+        assert (maze.start, maze.end) == (7, 0)
+        assert maze["start"] == (3, 2)
+        assert maze.room_id(5) == (2, 3)
+        assert maze.room_index((2, 3)) == 5
+        assert list(maze.neighbors(maze.start)) == [("up", 4), ("right", 8)]
+        assert list(maze.neighbors(4)) == [("up", 1), ("down", 7), ("left", 3)]
+
+    def test_maze_dict_round_trip(self):
+        maze = parse_maze_string("(3,3)-[34,14,12,6,77,5,1,19,9]")
+        maze_object = maze.to_dict()
+        assert isinstance(maze_object, dict)
+        assert maze_object[(2, 2)] == decode_room(77)
+        assert Maze.from_dict(maze_object).rooms == maze.rooms
+        with pytest.raises(KeyError):
+            maze[(4, 1)]
+
+    def test_maze_update_room(self):
+        maze = parse_maze_string("(3,3)-[34,14,12,6,77,5,1,19,9]")
+        maze.update_room((2, 2), 13)
+        assert maze.rooms[4] == 13
+        assert find_shortest_path(maze, lives=1) == ['up', 'up', 'left']
+        maze.update_room((3, 3), 9 | 16)
+        assert maze["start"] == (3, 3)
+        maze.update_room((3, 2), 3)
+        assert maze["start"] == (3, 3)
+        maze.update_room((1, 3), 12 | 32)
+        assert maze.end == 2
+        maze.update_room((1, 3), 12)
+        assert maze.end == 0
+
+    @pytest.mark.parametrize("function_args, error_message", [
+        (((2, 2), 128), r"room_value is not in range!"),
+        (((2, 2), "13"), r"room_value is not an int!"),
+        (((3, 2), 3), r"no start node was provided!"),
+        (((1, 1), 2), r"no end node was provided!")
+    ])
+    def test_maze_update_room_is_invalid(self, function_args, error_message):
+        maze = parse_maze_string("(3,3)-[34,14,12,6,77,5,1,19,9]")
+        with pytest.raises(Exception, match=error_message):
+            maze.update_room(*function_args)
+        assert maze.rooms == bytearray([34, 14, 12, 6, 77, 5, 1, 19, 9])
+        assert (maze.start, maze.end) == (7, 0)
+
+    def test_maze_update_room_needs_a_writable_maze(self):
+        maze = Maze.from_buffer(3, 3, bytes([34, 14, 12, 6, 77, 5, 1, 19, 9]), 7, 0)
+        with pytest.raises(Exception, match=r"maze is read only!"):
+            maze.update_room((2, 2), 13)
+
+class TestIterMazes(object):
+
+    def test_iter_mazes_is_lazy(self):
+        mazes = iter_mazes("test_mazes.txt")
+        assert next(mazes)["start"] == (3, 2)
+        assert len(list(mazes)) == 2
+
+    def test_iter_mazes_yields_errors_per_line(self, tmp_path):
+        maze_file = tmp_path / "mazes.txt"
+        maze_file.write_text("(3,3)-[34,14,12,6,77,5,1,19,9]\n\n(3,3)-[34,14]\n(3,3)-[34,14,12,6,77,5,1,19,1]\n")
+        mazes = list(iter_mazes(str(maze_file)))
+        assert len(mazes) == 3
+        assert isinstance(mazes[0], Maze) and isinstance(mazes[2], Maze)
+        assert isinstance(mazes[1], MazeFormatError)
+
+    def test_iter_mazes_is_quiet_by_default(self, capsys, caplog):
+        list(iter_mazes("test_mazes.txt"))
+        assert capsys.readouterr().out == ""
+        with caplog.at_level(logging.DEBUG, logger="maze_solver"):
+            list(iter_mazes("test_mazes.txt"))
+        assert "Loaded maze on line 1" in caplog.text
+
+class TestSolverStats(object):
+
+    @pytest.mark.parametrize("strategy", ["bfs", "astar", "bidirectional"])
+    def test_stats_are_filled_in(self, strategy):
+        stats = SolverStats()
+        maze = make_mazes("mazes.txt")[0]
+        assert len(find_shortest_path(maze, strategy=strategy, stats=stats)) == 28
+        assert stats.expanded > 0 and stats.enqueued > 0 and stats.queue_peak > 0
+        assert stats.pruned_visited > 0
+        assert set(stats.timings) == {"search"}
+        assert stats.as_dict()["expanded"] == stats.expanded
+
+    def test_stats_count_pruned_lives(self):
+        stats = SolverStats()
+        maze_object = parse_maze_string("(1,3)-[18,74,40]")
+        assert find_shortest_path(maze_object, lives=1, stats=stats) == ["N/A"]
+        assert stats.pruned_lives == 1
+        assert find_shortest_path(maze_object, lives=2, stats=stats) == ["right", "right"]
+        assert stats.pruned_lives == 1
+        assert stats.expanded == 3
+
+    def test_stats_time_packing_dict_mazes(self):
+        stats = SolverStats()
+        find_shortest_path(parse_maze_string("(3,3)-[34,14,12,6,77,5,1,19,9]").to_dict(), stats=stats)
+        assert set(stats.timings) == {"pack", "search"}
+
+    def test_nested_phases_are_left_out_of_the_outer_phase(self):
+        stats = SolverStats()
+        started = time.perf_counter()
+        with stats.phase("search"):
+            time.sleep(0.001)
+            with stats.phase("contract"):
+                time.sleep(0.05)
+        wall_time = time.perf_counter() - started
+        assert stats.timings["search"] < stats.timings["contract"]
+        assert stats.timings["search"] + stats.timings["contract"] <= wall_time
+        assert stats.timings["search"] + stats.timings["contract"] == pytest.approx(wall_time, abs=0.001)
+
+    def test_hooks_get_room_ids_and_lives(self):
+        expanded = []
+        goals = []
+        stats = SolverStats(on_expand=lambda room_id, lives: expanded.append((room_id, lives)),
+                            on_goal=lambda room_id, lives: goals.append((room_id, lives)))
+        maze_object = parse_maze_string("(3,3)-[34,14,12,6,77,5,1,19,9]")
+        assert find_shortest_path(maze_object, stats=stats) == ['up', 'up', 'left']
+        assert expanded[0] == ((3, 2), 3)
+        assert len(expanded) == stats.expanded
+        assert goals == [((1, 1), 2)]
+
+    def test_main_prints_stats(self, capsys):
+        main(["test_mazes.txt", "--stats"])
+        output = capsys.readouterr().out
+        assert "Maze #1 stats:" in output and "expanded" in output
+
+    def test_verbose_logs_the_search(self, caplog):
+        with caplog.at_level(logging.DEBUG, logger="maze_solver"):
+            find_shortest_path(parse_maze_string("(3,3)-[34,14,12,6,77,5,1,19,9]"))
+        assert "We found a path through in the map with 2 lives" in caplog.text
+
+class TestSolveStream(object):
+
+    def test_solve_stream_yields_paths_in_order(self, tmp_path):
+        maze_file = tmp_path / "mazes.txt"
+        maze_file.write_text("(3,3)-[34,14,12,6,77,5,1,19,9]\n(3,3)-[34,14]\n(3,3)-[34,14,12,6,77,5,1,18,9]\n")
+        results = list(solve_stream(str(maze_file)))
+        assert results[0] == ['up', 'up', 'left']
+        assert isinstance(results[1], MazeFormatError)
+        assert results[2] == ['right', 'up', 'up', 'left', 'left']
+
+def _open_maze_string(height, width):
+    """
+    Function that builds a maze string where every door between neighbouring rooms is open
+    """
+    room_values = []
+    for i in range(height):
+        for j in range(width):
+            room_values.append((1 if i > 0 else 0) | (4 if i < height - 1 else 0) |
+                               (8 if j > 0 else 0) | (2 if j < width - 1 else 0))
+    room_values[0] |= 16
+    room_values[-1] |= 32
+    return "({},{})-[{}]".format(height, width, ",".join(map(str, room_values)))
+
+class TestSolveBatch(object):
+
+    def test_maze_pickles_compactly(self):
+        maze = parse_maze_string(_open_maze_string(50, 50))
+        pickled_maze = pickle.dumps(maze)
+        assert len(pickled_maze) < 3000
+        assert pickle.loads(pickled_maze).rooms == maze.rooms
+        error = pickle.loads(pickle.dumps(MazeFormatError("expected '('", 0)))
+        assert (error.reason, error.offset) == ("expected '('", 0)
+
+    def test_find_shortest_path_times_out(self):
+        with pytest.raises(TimeoutError):
+            find_shortest_path(parse_maze_string(_open_maze_string(200, 200)), timeout=0)
+
+    @pytest.mark.parametrize("function_args", [(1), (2)])
+    def test_solve_batch_keeps_input_order(self, tmp_path, function_args):
+        maze_file = tmp_path / "mazes.txt"
+        maze_file.write_text("\n".join([
+            "(3,3)-[34,14,12,6,77,5,1,19,9]",
+            "(3,3)-[34,14]",
+            _open_maze_string(4, 5),
+            "(3,3)-[34,14,12,6,77,5,1,18,9]"
+        ]))
+        results = list(solve_batch(str(maze_file), workers=2, chunk_size=function_args))
+        assert results[0] == ['up', 'up', 'left']
+        assert isinstance(results[1], MazeFormatError)
+        assert len(results[2]) == 7
+        assert results[3] == ['right', 'up', 'up', 'left', 'left']
+
+    def test_solve_batch_parameters_are_invalid(self):
+        with pytest.raises(Exception, match=r"chunk_size is not a positive int!"):
+            list(solve_batch("test_mazes.txt", chunk_size=0))
+
+    @pytest.mark.parametrize("function_args", [
+        (["test_mazes.txt"]),
+        (["test_mazes.txt", "--workers", "2", "--chunk-size", "1", "--timeout", "5"])
+    ])
+    def test_main_prints_paths(self, capsys, function_args):
+        main(function_args)
+        assert capsys.readouterr().out.splitlines() == [
+            "Output Answer:",
+            "['up', 'up', 'left']",
+            "['up', 'up', 'left']",
+            "['right', 'up', 'up', 'left', 'left']"
+        ]
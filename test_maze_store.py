@@ -0,0 +1,53 @@
+import pytest
+from maze_solver import find_shortest_path, make_mazes
+from maze_store import MazeStore, convert_maze_file, solve_store
+
+@pytest.fixture
+def store_path(tmp_path):
+    maze_file = tmp_path / "mazes.txt"
+    maze_file.write_text("(3,3)-[34,14,12,6,77,5,1,19,9]\n(3,3)-[34,14]\n" + open("mazes.txt").read())
+    store_path = str(tmp_path / "mazes.mzp")
+    assert convert_maze_file(str(maze_file), store_path) == (4, 1)
+    return store_path
+
+class TestConvertMazeFile(object):
+
+    @pytest.mark.parametrize("function_args, error_message", [
+        ((None, "mazes.mzp"), r"maze_file_path is not a string!"),
+        (("mazes.txt", None), r"store_path is not a string!")
+    ])
+    def test_convert_maze_file_parameters_are_invalid(self, function_args, error_message):
+        with pytest.raises(Exception, match=error_message):
+            convert_maze_file(*function_args)
+
+class TestMazeStore(object):
+
+    def test_maze_store_parameters_are_invalid(self, tmp_path):
+        not_a_store = tmp_path / "mazes.txt"
+        not_a_store.write_text("(3,3)-[34,14,12,6,77,5,1,19,9]\n")
+        with pytest.raises(Exception, match=r"store_path is not a maze store!"):
+            MazeStore(str(not_a_store))
+
+    def test_maze_store_hands_out_views(self, store_path):
+        text_mazes = make_mazes("mazes.txt")
+        with MazeStore(store_path) as store:
+            assert len(store) == 4
+            assert store[0]["start"] == (3, 2)
+            assert isinstance(store[1].rooms, memoryview)
+            assert [store[n] == text_mazes[n - 1] for n in range(1, 4)] == [True, True, True]
+            assert find_shortest_path(store[-1]) == find_shortest_path(text_mazes[-1])
+            with pytest.raises(IndexError):
+                store[4]
+
+    def test_maze_store_closes_with_mazes_still_alive(self, store_path):
+        with pytest.raises(KeyError):
+            with MazeStore(store_path) as store:
+                maze = store[0]
+                raise KeyError("in flight")
+        assert store._file.closed
+        assert find_shortest_path(maze) == ['up', 'up', 'left']
+
+    def test_solve_store_keeps_store_order(self, store_path):
+        results = list(solve_store(store_path, workers=2, chunk_size=1))
+        assert results[0] == ['up', 'up', 'left']
+        assert [len(path) for path in results[1:]] == [28, 59, 123]
@@ -0,0 +1,48 @@
+import random
+import pytest
+from maze_solver import find_shortest_path, make_mazes, parse_maze_string, SolverStats
+from maze_testing import random_maze_string
+
+pytest.importorskip("numpy")
+
+def _walk(maze, path, lives):
+    """
+    Function that follows a path through a maze and returns the room it ends in and the lives left
+    """
+    room = maze.start
+    lives -= 1 if maze.rooms[room] & 64 else 0
+    for direction in path:
+        room = dict(maze.neighbors(room))[direction]
+        lives -= 1 if maze.rooms[room] & 64 else 0
+    return room, lives
+
+class TestWavefront(object):
+
+    def test_wavefront_matches_bfs_on_mazes(self):
+        for maze in make_mazes("mazes.txt") + make_mazes("test_mazes.txt"):
+            assert len(find_shortest_path(maze, strategy="wavefront")) == len(find_shortest_path(maze))
+
+    @pytest.mark.parametrize("seed", range(5))
+    def test_wavefront_matches_bfs_on_random_mazes(self, seed):
+        rng = random.Random(seed)
+        for _ in range(40):
+            maze_string = random_maze_string(rng, rng.randint(1, 8), rng.randint(1, 8), door_chance=0.6,
+                                             mine_chance=0.25, max_ends=1)
+            maze = parse_maze_string(maze_string)
+            lives = rng.randint(1, 4)
+            expected_result = find_shortest_path(maze, lives=lives)
+            shortest_path = find_shortest_path(maze, lives=lives, strategy="wavefront")
+            assert len(shortest_path) == len(expected_result)
+            if shortest_path != ["N/A"]:
+                room, lives_left = _walk(maze, shortest_path, lives)
+                assert maze.rooms[room] & 32 and lives_left > 0
+            else:
+                assert expected_result == ["N/A"]
+
+    def test_wavefront_fills_in_stats(self):
+        stats = SolverStats()
+        maze = make_mazes("mazes.txt")[0]
+        find_shortest_path(maze, strategy="wavefront", stats=stats)
+        assert 0 < stats.expanded and stats.queue_peak > 0
+        assert stats.pruned_visited > 0
+        assert "search" in stats.timings